@@ -1,40 +1,109 @@
 """Main app file."""
 
+import os
+from collections.abc import Callable
+from functools import partial
+from typing import TYPE_CHECKING
+
 from textual.app import App
 from textual.reactive import var
 
 from protocols import PropertyService
-from screens import MainScreen
-from utils import (
-    HouseService,
-    RightMove,
-    RightMoveFetcher,
-    RightMoveParser,
-    RightMoveStore,
-)
+from screens import MainScreen, MetricsScreen
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from utils import ImageService, RefreshScheduler
+
+type Services = tuple[PropertyService, ImageService, RefreshScheduler | None]
+
+
+def open_services(db_name: str, stream_models: bool = False) -> Services:
+    """Open the store and build the service, image loader and refresher.
+
+    This runs in a worker after the first frame is drawn. Connecting to SQLite,
+    checking the schema and importing httpx are the slow parts of startup.
+    `stream_models` stops reading pages after PAGE_MODEL, at the cost of the
+    keep-alive connection.
+    """
+    from utils import (
+        HouseService,
+        ImageService,
+        RefreshScheduler,
+        RightMove,
+        RightMoveFetcher,
+        RightMoveParser,
+        RightMoveStore,
+    )
+
+    fetcher = RightMoveFetcher(stream_models=stream_models)
+    store = RightMoveStore(db_name, wal=True, synchronous="NORMAL")
+    service = HouseService([RightMove()], [fetcher], [RightMoveParser()], [store])
+    return service, ImageService(fetcher, ".image_cache"), RefreshScheduler(service)
 
 
 class Houses(App):
+    """The TUI. Pass `open_services` to open the store after the first frame.
+
+    Services may instead be assigned to `service`, `images` and `refresher`
+    before the app runs; images are not shown while `images` is None. The store
+    must allow use from other threads, as searches and batch writes run in
+    worker threads.
+    """
+
     CSS_PATH = "assets/styles.tcss"
-    BINDINGS = [("q", "quit", "Quit")]
+    BINDINGS = [("q", "quit", "Quit"), ("d", "show_metrics", "Metrics")]
     SCREENS = {
         "main": MainScreen,
     }
-    service: var[PropertyService]
+    # Widgets watch `service` and start loading once it is set.
+    service: var[PropertyService | None] = var(None)
+    images: var["ImageService | None"] = var(None)
+    refresher: var["RefreshScheduler | None"] = var(None)
+
+    def __init__(self, open_services: Callable[[], Services] | None = None) -> None:
+        super().__init__()
+        self.open_services = open_services
 
     def on_mount(self) -> None:
         self.theme = "nord"
         self.push_screen("main")
+        if self.open_services is not None:
+            self.run_worker(self.load_services, thread=True, group="startup")
+        else:
+            self.start_refresher()
 
+    def load_services(self) -> None:
+        if self.open_services is not None:
+            self.call_from_thread(self.set_services, *self.open_services())
 
-if __name__ == "__main__":
-    db_name = "houses_2.db"
-    sites = [RightMove()]
-    fetchers = [RightMoveFetcher()]
-    parsers = [RightMoveParser()]
-    stores = [RightMoveStore(db_name)]
-    service = HouseService(sites, fetchers, parsers, stores)
-    app = Houses()
-    app.service = service
+    def set_services(
+        self,
+        service: PropertyService,
+        images: "ImageService",
+        refresher: "RefreshScheduler | None",
+    ) -> None:
+        self.images = images
+        self.refresher = refresher
+        self.service = service
+        self.start_refresher()
+
+    def start_refresher(self) -> None:
+        if self.refresher is not None:
+            self.run_worker(self.refresher.run(), group="refresh", exit_on_error=False)
 
+    def action_show_metrics(self) -> None:
+        self.push_screen(MetricsScreen())
+
+    async def on_unmount(self) -> None:
+        if self.service is not None:
+            await self.service.aclose()
+
+
+if __name__ == "__main__":
+    # HOUSES_METRICS=1 records from startup; `d` in the app toggles it too.
+    metrics.enabled = bool(os.environ.get("HOUSES_METRICS"))
+    # HOUSES_STREAM_MODELS=1 trades pooled connections for shorter downloads.
+    stream_models = bool(os.environ.get("HOUSES_STREAM_MODELS"))
+    app = Houses(partial(open_services, "houses_2.db", stream_models))
     app.run()
@@ -0,0 +1,124 @@
+"""Requests/sec of RightMoveFetcher against a local stub server.
+
+Compares the previous per-request connections (`requests.get` and a new
+`httpx.AsyncClient` per call) with the fetcher's pooled clients, and with
+streaming that stops reading once PAGE_MODEL is complete.
+
+    python -m bench.fetch -n 200 -c 10
+"""
+
+import argparse
+import asyncio
+import gzip
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+import requests
+
+from utils import FetchPolicy, RightMoveFetcher
+
+CONTENT = Path(__file__).parent.parent / "content.html"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body: bytes = CONTENT.read_bytes()
+    gzipped: bytes = gzip.compress(body)
+
+    def do_GET(self) -> None:
+        body = self.body
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = self.gzipped
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_sync(fetch: Callable[[str], object], url: str, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fetch(url)
+    return n / (time.perf_counter() - start)
+
+
+def time_async(
+    fetch: Callable[[str], Awaitable[object]], url: str, n: int, concurrency: int
+) -> float:
+    async def run() -> float:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one() -> None:
+            async with semaphore:
+                await fetch(url)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n)))
+        return n / (time.perf_counter() - start)
+
+    return asyncio.run(run())
+
+
+def requests_get(url: str) -> str:
+    response = requests.get(url, headers=RightMoveFetcher.HEADERS)
+    response.raise_for_status()
+    return response.text
+
+
+async def httpx_per_call(url: str) -> str:
+    async with httpx.AsyncClient() as client:
+        response = await client.get(url, headers=RightMoveFetcher.HEADERS)
+        return response.text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=200, help="requests per case")
+    parser.add_argument("-c", type=int, default=10, help="async concurrency")
+    args = parser.parse_args()
+
+    server = serve()
+    url = f"http://127.0.0.1:{server.server_port}/properties/163721768"
+    # The stub server has no limits to be polite about.
+    policy = FetchPolicy(rate=None, max_concurrent=None, max_per_host=None)
+    fetcher = RightMoveFetcher(policy=policy)
+    streamer = RightMoveFetcher(stream_models=True, policy=policy)
+
+    async def pooled_async(url: str) -> str | bytes:
+        return await fetcher.fetch_async(url)
+
+    async def streamed_async(url: str) -> str | bytes:
+        return await streamer.fetch_async(url)
+
+    results = {
+        "sync  requests.get": time_sync(requests_get, url, args.n),
+        "sync  pooled httpx.Client": time_sync(fetcher.fetch, url, args.n),
+        "async AsyncClient per call": time_async(httpx_per_call, url, args.n, args.c),
+        "async pooled AsyncClient": time_async(pooled_async, url, args.n, args.c),
+        "async streamed PAGE_MODEL": time_async(streamed_async, url, args.n, args.c),
+    }
+    fetcher.close()
+    streamer.close()
+    server.shutdown()
+
+    for name, rate in results.items():
+        print(f"{name:<28} {rate:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
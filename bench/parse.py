@@ -0,0 +1,80 @@
+"""Pages/sec of PAGE_MODEL parsing over the checked-in content.html.
+
+Compares the previous recursive `regex` extraction with `utils.page_model`,
+for PAGE_MODEL alone and for every window model on the page.
+
+    python -m bench.parse -n 200
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import orjson
+import regex
+from bs4 import BeautifulSoup
+
+from utils import RightMoveParser
+
+CONTENT = Path(__file__).parent.parent / "content.html"
+
+
+def regex_parse(content: str) -> dict:
+    pattern = r"window\.PAGE_MODEL\s*=\s*(\{(?:[^{}]|(?1))*\})"
+    match_ = regex.search(pattern, content, regex.DOTALL)
+    if not match_:
+        raise ValueError("Couldn't locate page model.")
+    return orjson.loads(match_.group(1).strip())
+
+
+def soup_extract_models(content: str) -> dict[str, dict]:
+    soup = BeautifulSoup(content, "html.parser")
+    pattern = regex.compile(r"window\.(\w+)\s*=\s*\{")
+    script = soup.find("script", string=pattern)
+    script_text = script.get_text(strip=True) if script else ""
+    models = {}
+    pattern = r"window\.(\w+)\s*=\s*(\{(?:[^{}]|(?2))*\})"
+    for match_ in regex.finditer(pattern, script_text, regex.DOTALL):
+        try:
+            models[match_.group(1)] = orjson.loads(match_.group(2))
+        except orjson.JSONDecodeError:
+            continue
+    return models
+
+
+def pages_per_second(
+    parse: Callable[..., object], content: str | bytes, n: int
+) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        parse(content)
+    return n / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=200, help="pages per case")
+    args = parser.parse_args()
+
+    text = CONTENT.read_text()
+    raw = CONTENT.read_bytes()
+    rightmove = RightMoveParser()
+    assert regex_parse(text) == rightmove.parse(raw).data
+    assert soup_extract_models(text) == rightmove.parse_models(raw)
+
+    results = {
+        "recursive regex (str)": pages_per_second(regex_parse, text, args.n),
+        "page_model (str)": pages_per_second(rightmove.parse, text, args.n),
+        "page_model (bytes)": pages_per_second(rightmove.parse, raw, args.n),
+        "all models, soup + regex": pages_per_second(
+            soup_extract_models, text, max(1, args.n // 10)
+        ),
+        "all models, page_model": pages_per_second(rightmove.parse_models, raw, args.n),
+    }
+    for name, rate in results.items():
+        print(f"{name:<26} {rate:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Import time of the app and CLI entry points, from `python -X importtime`.
+
+Each entry point is imported in a fresh interpreter `-n` times. The report
+gives the median cumulative import time, the heaviest modules, and any module
+that should be deferred until after startup but was imported anyway.
+
+    python -m bench.startup -n 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+ROOT = Path(__file__).parent.parent
+# Modules each entry point must not import before its first frame or command.
+DEFERRED = {
+    "app": ("httpx", "sqlite3", "utils.rightmove", "utils.house_service"),
+    "cli": ("textual", "textual_image", "PIL", "httpx"),
+}
+
+
+class Imports(NamedTuple):
+    total: int
+    # Cumulative µs of each module the entry point imported directly.
+    children: dict[str, int]
+    # Everything imported on the way, at any depth.
+    modules: set[str]
+
+
+def import_times(module: str) -> Imports:
+    """Parse `-X importtime` for `import module` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines come children first, indented two spaces per level, so the entry
+    # point's imports are the lines since the previous top-level module.
+    subtree: list[tuple[int, str, int]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == module:
+            return Imports(
+                int(cumulative),
+                {child: time for level, child, time in subtree if level == 1},
+                {child for _, child, _ in subtree},
+            )
+        if depth == 0:
+            subtree.clear()
+        else:
+            subtree.append((depth, name.strip(), int(cumulative)))
+    raise LookupError(f"{module} was not imported")
+
+
+def measure(module: str, runs: int) -> tuple[list[int], Imports]:
+    """Total import times over `runs` imports, and the last run's breakdown."""
+    totals = []
+    for _ in range(runs):
+        imports = import_times(module)
+        totals.append(imports.total)
+    return totals, imports
+
+
+def deferred_imports(module: str, imports: Imports) -> list[str]:
+    return [name for name in DEFERRED.get(module, ()) if name in imports.modules]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=5, help="imports per entry point")
+    parser.add_argument("--top", type=int, default=10, help="heaviest modules shown")
+    parser.add_argument(
+        "modules", nargs="*", default=list(DEFERRED), help="entry points to import"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        totals, imports = measure(module, args.n)
+        print(f"import {module}: median {statistics.median(totals) / 1e3:.1f} ms")
+        top = sorted(imports.children.items(), key=lambda item: item[1], reverse=True)
+        for name, time in top[: args.top]:
+            print(f"  {time / 1e3:8.1f} ms  {name}")
+        if imported := deferred_imports(module, imports):
+            print(f"  should be deferred: {', '.join(imported)}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Inserts/sec of RightMoveStore writes with N synthetic ~54 KB records.
+
+Compares one commit per `set` with a single `set_many` transaction, on the
+default rollback journal and in WAL mode.
+
+    python -m bench.store -n 500
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from utils import RightMoveProperty, RightMoveStore
+
+RECORD_SIZE = 54_000
+WORDS = (
+    "detached semi terraced cottage barn farmhouse garden garage orchard paddock "
+    "annexe views village river canal kitchen conservatory driveway bungalow "
+    "beeston tarporley chester nantwich"
+).split()
+
+
+def synthetic_page_model(i: int, record_size: int = RECORD_SIZE) -> dict:
+    """A PAGE_MODEL with the fields the store reads, padded to ~`record_size`."""
+    rng = random.Random(i)
+    description = " ".join(rng.choices(WORDS, k=record_size // 7))[:record_size]
+    return {
+        "propertyData": {
+            "id": str(i),
+            "address": {
+                "displayAddress": f"{i} {rng.choice(WORDS).title()} Street",
+                "outcode": f"CW{i % 20}",
+                "incode": "9NJ",
+            },
+            "prices": {"primaryPrice": f"£{500_000 + i:,}"},
+            "bedrooms": i % 6,
+            "location": {
+                "latitude": 52.0 + rng.random() * 2,
+                "longitude": -3.0 + rng.random() * 2,
+            },
+            "images": [
+                {"url": f"https://media.example/{i}/{j}.jpeg"} for j in range(20)
+            ],
+            "text": {"propertyPhrase": "4 bedroom house", "description": description},
+            "keyFeatures": rng.sample(WORDS, 4),
+            "tags": [],
+        }
+    }
+
+
+def synthetic_properties(
+    n: int, record_size: int = RECORD_SIZE, start: int = 0
+) -> list[tuple[str, RightMoveProperty]]:
+    return [
+        (
+            f"https://www.rightmove.co.uk/properties/{i}",
+            RightMoveProperty(synthetic_page_model(i, record_size)),
+        )
+        for i in range(start, start + n)
+    ]
+
+
+def per_row(store: RightMoveStore, items: list[tuple[str, RightMoveProperty]]) -> None:
+    for url, property in items:
+        store.set(url, property, "to-review")
+
+
+def batched(store: RightMoveStore, items: list[tuple[str, RightMoveProperty]]) -> None:
+    store.set_many(items, "to-review")
+
+
+def inserts_per_second(
+    write: Callable[[RightMoveStore, list], None], items: list, **options
+) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        store = RightMoveStore(Path(directory) / "bench.db", **options)
+        start = time.perf_counter()
+        write(store, items)
+        elapsed = time.perf_counter() - start
+        store.conn.close()
+    return len(items) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=500, help="records per case")
+    args = parser.parse_args()
+
+    items = synthetic_properties(args.n)
+    wal = {"wal": True, "synchronous": "NORMAL"}
+    results = {
+        "set, rollback journal": inserts_per_second(per_row, items),
+        "set_many, rollback journal": inserts_per_second(batched, items),
+        "set, WAL": inserts_per_second(per_row, items, **wal),
+        "set_many, WAL": inserts_per_second(batched, items, **wal),
+    }
+    for name, rate in results.items():
+        print(f"{name:<28} {rate:8.1f} inserts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""Offline benchmark suite over the checked-in fixtures, with JSON output.
+
+Covers entry point import times, page parsing, model extraction,
+RightMoveStore writes, reads and legacy migration at several table sizes, and
+the legacy HouseQuery JSON queries. Results can be saved and compared between
+commits:
+
+    python -m bench -o before.json
+    python -m bench -o after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import NamedTuple
+
+import orjson
+
+from utils import RightMoveParser, RightMoveProperty, RightMoveStore
+from utils.json_store import HouseQuery
+from utils.web_requests import extract_models
+
+from . import startup
+from .store import WORDS, synthetic_page_model, synthetic_properties
+
+ROOT = Path(__file__).parent.parent
+CONTENT = ROOT / "content.html"
+HOUSES_DB = ROOT / "houses.db"
+SIZES = (10, 10_000, 100_000)
+# Payloads are kept small so 100k rows stay a few hundred MB on disk.
+RECORD_SIZE = 2_000
+STATUSES = ("to-review", "to-view", "viewed-yes", "viewed-no")
+
+
+class Result(NamedTuple):
+    name: str
+    size: int | None
+    n: int
+    ops_per_sec: float
+    mean_us: float
+    p50_us: float
+    p95_us: float
+
+
+def measure(
+    name: str,
+    operation: Callable[[int], object],
+    *,
+    size: int | None = None,
+    n: int = 1000,
+    budget: float = 1.0,
+) -> Result:
+    """Time up to `n` calls of `operation(i)`, stopping after `budget` seconds."""
+    operation(0)
+    timings: list[float] = []
+    deadline = time.perf_counter() + budget
+    for i in range(n):
+        start = time.perf_counter()
+        operation(i)
+        timings.append(time.perf_counter() - start)
+        if len(timings) >= 3 and time.perf_counter() > deadline:
+            break
+    mean = statistics.fmean(timings)
+    quantiles = statistics.quantiles(timings, n=20) if len(timings) > 1 else timings
+    return Result(
+        name,
+        size,
+        len(timings),
+        1 / mean,
+        mean * 1e6,
+        statistics.median(timings) * 1e6,
+        quantiles[-1] * 1e6,
+    )
+
+
+def startup_cases(runs: int = 5) -> list[Result]:
+    """Cumulative `-X importtime` of each entry point, in a fresh interpreter."""
+    results = []
+    for module in startup.DEFERRED:
+        totals, _ = startup.measure(module, runs)
+        mean = statistics.fmean(totals)
+        results.append(
+            Result(
+                f"import {module} (-X importtime)",
+                None,
+                runs,
+                1e6 / mean,
+                mean,
+                statistics.median(totals),
+                max(totals),
+            )
+        )
+    return results
+
+
+def parse_cases() -> list[Result]:
+    text = CONTENT.read_text()
+    raw = CONTENT.read_bytes()
+    parser = RightMoveParser()
+    return [
+        measure("RightMoveParser.parse (bytes)", lambda _: parser.parse(raw), n=200),
+        measure("RightMoveParser.parse (str)", lambda _: parser.parse(text), n=200),
+        measure("web_requests.extract_models", lambda _: extract_models(raw), n=200),
+    ]
+
+
+def fixture_cases(directory: Path) -> list[Result]:
+    """The 10 real PAGE_MODEL rows in houses.db, in both schemas."""
+    legacy = sqlite3.connect(HOUSES_DB)
+    rows = legacy.execute("select property_number, status, data from houses").fetchall()
+    store = RightMoveStore(directory / "fixture.db", wal=True, synchronous="NORMAL")
+    for property_number, status, data in rows:
+        url = f"https://www.rightmove.co.uk/properties/{property_number}"
+        store.set(url, RightMoveProperty.from_json(data.encode()), status)
+    urls = [f"https://www.rightmove.co.uk/properties/{row[0]}" for row in rows]
+    results = [
+        measure(
+            "fixture RightMoveStore.get",
+            lambda i: store.get(urls[i % len(urls)]),
+            size=len(urls),
+        ),
+        measure(
+            "fixture RightMoveStore.get().data",
+            lambda i: store.get(urls[i % len(urls)]).data,
+            size=len(urls),
+        ),
+        *house_query_cases(legacy, [row[0] for row in rows], "fixture", len(rows)),
+    ]
+    store.conn.close()
+    legacy.close()
+    return results
+
+
+def house_query_cases(
+    conn: sqlite3.Connection, property_numbers: list[str], prefix: str, size: int
+) -> list[Result]:
+    query = HouseQuery()
+    addresses = query.atomic_query(
+        [
+            ("property_number", "property_number"),
+            ("propertyData.address.displayAddress", "description"),
+        ],
+        status="to-review",
+    )
+
+    def image_urls(i: int) -> list:
+        number = property_numbers[i % len(property_numbers)]
+        sql = query.array_query(
+            "propertyData.images", [(".url", "url")], property_number=number
+        )
+        return conn.execute(sql).fetchall()
+
+    return [
+        measure(
+            f"{prefix} HouseQuery.atomic_query",
+            lambda _: conn.execute(addresses).fetchall(),
+            size=size,
+            n=100,
+        ),
+        measure(f"{prefix} HouseQuery.array_query", image_urls, size=size, n=200),
+    ]
+
+
+def store_cases(directory: Path, size: int) -> list[Result]:
+    store = RightMoveStore(
+        directory / f"store-{size}.db", wal=True, synchronous="NORMAL"
+    )
+    legacy = sqlite3.connect(directory / f"legacy-{size}.db")
+    legacy.execute(
+        "create table houses (property_number text primary key, status text, data JSON)"
+    )
+    start = time.perf_counter()
+    for offset in range(0, size, 5_000):
+        batch = synthetic_properties(min(5_000, size - offset), RECORD_SIZE, offset)
+        for index, status in enumerate(STATUSES):
+            store.set_many(batch[index::4], status)
+    populate = time.perf_counter() - start
+    legacy.executemany(
+        "insert into houses values (?, ?, ?)",
+        (
+            (
+                str(i),
+                STATUSES[i % 4],
+                orjson.dumps(synthetic_page_model(i, RECORD_SIZE)).decode(),
+            )
+            for i in range(size)
+        ),
+    )
+    legacy.commit()
+
+    rng = random.Random(size)
+    urls = [
+        f"https://www.rightmove.co.uk/properties/{rng.randrange(size)}"
+        for _ in range(1000)
+    ]
+    new_rows = synthetic_properties(200, RECORD_SIZE, size)
+    numbers = [url.rsplit("/", 1)[1] for url in urls]
+    words = [rng.choice(WORDS) for _ in range(200)]
+    results = [
+        Result(
+            "RightMoveStore.set_many (populate)", size, size, size / populate, 0, 0, 0
+        ),
+        measure(
+            "RightMoveStore.set",
+            lambda i: store.set(*new_rows[i % len(new_rows)], "to-review"),
+            size=size,
+            n=len(new_rows),
+        ),
+        measure("RightMoveStore.get", lambda i: store.get(urls[i]), size=size),
+        measure(
+            "RightMoveStore.get().data",
+            lambda i: store.get(urls[i]).data,
+            size=size,
+        ),
+        measure(
+            "RightMoveStore.list_by_status (page of 50)",
+            lambda _: store.list_by_status("to-review", limit=50),
+            size=size,
+        ),
+        measure(
+            "RightMoveStore.get_image_urls",
+            lambda i: store.get_image_urls(urls[i]),
+            size=size,
+        ),
+        measure(
+            "RightMoveStore.search (text, 50)",
+            lambda i: store.search(words[i], limit=50),
+            size=size,
+            n=200,
+        ),
+        *house_query_cases(legacy, numbers, "synthetic", size),
+    ]
+    store.conn.close()
+    legacy.close()
+
+    start = time.perf_counter()
+    migrated = RightMoveStore(
+        directory / f"legacy-{size}.db", wal=True, synchronous="NORMAL"
+    )
+    elapsed = time.perf_counter() - start
+    migrated.conn.close()
+    results.append(
+        Result("RightMoveStore.migrate (legacy)", size, size, size / elapsed, 0, 0, 0)
+    )
+    return results
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def compare(baseline: dict, results: list[dict], threshold: float) -> list[str]:
+    """Describe every case that got more than `threshold` slower."""
+    before = {(row["name"], row["size"]): row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        old = before.get((row["name"], row["size"]))
+        if old is None or not old["ops_per_sec"]:
+            continue
+        change = row["ops_per_sec"] / old["ops_per_sec"] - 1
+        line = f"{label(row):<58} {change:+7.1%}"
+        print(line)
+        if change < -threshold:
+            regressions.append(line)
+    return regressions
+
+
+def label(row: dict) -> str:
+    return row["name"] if row["size"] is None else f"{row['name']} @ {row['size']:,}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=SIZES, help="synthetic table sizes"
+    )
+    parser.add_argument("-o", "--output", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="slowdown that counts as a regression (default 0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+
+    results = startup_cases()
+    results.extend(parse_cases())
+    with tempfile.TemporaryDirectory() as directory:
+        results.extend(fixture_cases(Path(directory)))
+        for size in args.sizes:
+            results.extend(store_cases(Path(directory), size))
+
+    rows = [result._asdict() for result in results]
+    for row in rows:
+        print(f"{label(row):<58} {row['ops_per_sec']:12.1f} ops/s")
+    if args.output is not None:
+        report = {"meta": metadata(), "results": rows}
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.compare is not None:
+        print(f"\nChange in ops/s against {args.compare}:")
+        regressions = compare(
+            json.loads(args.compare.read_text()), rows, args.threshold
+        )
+        if regressions:
+            print(
+                f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}"
+            )
+            sys.exit(1)
@@ -0,0 +1,355 @@
+"""Headless batch jobs: import listings, re-scrape them and export the store.
+
+    python cli.py import ids.txt --status to-review
+    cat urls.txt | python cli.py import - --status to-view
+    python cli.py refresh --status to-view --max-age 86400
+    python cli.py export --status viewed-yes -o yes.csv
+    python cli.py export --data -o houses.parquet
+    python cli.py --db houses.db migrate --checkpoint 10000
+
+Imports read one property ID or listing URL per line. Exports stream rows from
+the store a page at a time. Nothing here imports Textual or Pillow, so jobs
+start quickly from cron.
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import sys
+import time
+from collections.abc import Coroutine, Iterable, Iterator
+from contextlib import ExitStack
+from pathlib import Path
+from typing import IO
+from urllib.parse import urldefrag
+
+import orjson
+
+from protocols import Property, PropertyService, PropertySite
+from utils.house_service import HouseService
+from utils.metrics import metrics
+from utils.migrations import Migration
+from utils.rightmove import RightMove, RightMoveParser, RightMoveStore
+
+DB_NAME = "houses_2.db"
+FORMATS = ("ndjson", "csv", "parquet")
+# URLs handed to the service at once. Results are dropped after each chunk, so
+# memory stays flat however long the input is.
+CHUNK_SIZE = 500
+PARQUET_TYPES = {"text": "string", "integer": "int64", "real": "float64"}
+
+
+def migrate(db_path: str, checkpoint: int | None) -> int:
+    """Bring the store's schema up to date, printing progress to stderr."""
+    store = RightMoveStore(db_path, wal=True, synchronous="NORMAL", migrate=False)
+
+    def progress(migration: Migration, rows: int) -> None:
+        print(f"  {migration.description}: {rows:,} rows", file=sys.stderr)
+
+    try:
+        start = store.schema_version
+        applied = store.migrate(checkpoint=checkpoint, progress=progress)
+    finally:
+        store.conn.close()
+    if applied:
+        print(
+            f"migrated from version {start} to {applied[-1].version}", file=sys.stderr
+        )
+    else:
+        print(f"already at version {start}", file=sys.stderr)
+    return 0
+
+
+def build_service(
+    db_path: str, *, fetch: bool = True, stream_models: bool = False
+) -> HouseService:
+    """The Rightmove service. Exports pass `fetch=False` to skip loading httpx."""
+    fetchers = []
+    if fetch:
+        from utils.rightmove_fetcher import RightMoveFetcher
+
+        fetchers.append(RightMoveFetcher(stream_models=stream_models))
+    return HouseService(
+        [RightMove()],
+        fetchers,
+        [RightMoveParser()],
+        [RightMoveStore(db_path, wal=True, synchronous="NORMAL")],
+    )
+
+
+def read_urls(lines: Iterable[str], site: PropertySite) -> Iterator[str]:
+    """Listing URLs from lines of IDs or URLs, skipping blanks and # comments."""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "://" in line:
+            yield urldefrag(line).url
+        else:
+            yield site.get_property_url(line)
+
+
+class Report:
+    """Counts results and prints each failure to stderr.
+
+    Called with each fetched page, and `add_saved` with each written batch.
+    Pages fetched but not written are listings deleted while they downloaded.
+    """
+
+    def __init__(self) -> None:
+        self.fetched = 0
+        self.saved = 0
+        self.failed = 0
+
+    def __call__(self, url: str, result: Property | Exception) -> None:
+        if isinstance(result, Exception):
+            self.failed += 1
+            print(f"{url}: {result!r}", file=sys.stderr)
+        else:
+            self.fetched += 1
+
+    def add_saved(self, urls: list[str]) -> None:
+        self.saved += len(urls)
+
+    @property
+    def skipped(self) -> int:
+        return self.fetched - self.saved
+
+    def summary(self, verb: str) -> str:
+        text = f"{verb} {self.saved:,}, failed {self.failed:,}"
+        if self.skipped:
+            text += f", skipped {self.skipped:,} deleted"
+        return text
+
+
+async def add_urls(
+    service: PropertyService,
+    urls: Iterable[str],
+    status: str,
+    report: Report,
+    max_concurrent: int,
+) -> None:
+    for chunk in itertools.batched(urls, CHUNK_SIZE):
+        await service.add_urls_async(
+            chunk,
+            status,
+            max_concurrent=max_concurrent,
+            progress=report,
+            saved=report.add_saved,
+        )
+
+
+async def refresh(
+    service: PropertyService,
+    status: str | None,
+    max_age: float | None,
+    report: Report,
+    max_concurrent: int,
+) -> None:
+    """Re-scrape stored listings.
+
+    Each listing keeps the status it has when its new page is saved, so moves
+    and deletes made in the app while this runs are not undone.
+    """
+    cutoff = None if max_age is None else time.time() - max_age
+    urls = (
+        row["url"]
+        for row in service.iter_rows(status)
+        if cutoff is None or (row["checked_at"] or 0) < cutoff
+    )
+    # Rows are paged by url, which re-scraping never changes, so reading and
+    # writing can be interleaved.
+    for chunk in itertools.batched(urls, CHUNK_SIZE):
+        await service.refresh_urls_async(
+            chunk,
+            max_concurrent=max_concurrent,
+            progress=report,
+            saved=report.add_saved,
+        )
+
+
+def export_columns(with_data: bool) -> list[str]:
+    columns = list(RightMoveStore.EXPORT_COLUMNS)
+    return columns + ["data"] if with_data else columns
+
+
+def write_ndjson(rows: Iterable[dict], out: IO[bytes]) -> int:
+    count = 0
+    for count, row in enumerate(rows, 1):
+        if "data" in row:
+            # Copied into the output as-is rather than decoded and re-encoded.
+            row["data"] = orjson.Fragment(row["data"])
+        out.write(orjson.dumps(row))
+        out.write(b"\n")
+    return count
+
+
+def write_csv(rows: Iterable[dict], out: IO[bytes], with_data: bool) -> int:
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.DictWriter(text, export_columns(with_data))
+    writer.writeheader()
+    count = 0
+    for count, row in enumerate(rows, 1):
+        if "data" in row:
+            row["data"] = row["data"].decode()
+        writer.writerow(row)
+    text.detach()
+    return count
+
+
+def check_parquet() -> None:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as error:
+        raise ImportError("Parquet export requires the pyarrow package") from error
+
+
+def write_parquet(rows: Iterable[dict], out: IO[bytes], with_data: bool) -> int:
+    check_parquet()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"url": "text", "status": "text", "checked_at": "real"}
+    types |= RightMoveStore.HOT_COLUMNS
+    fields = [
+        pa.field(column, PARQUET_TYPES[types[column]])
+        for column in RightMoveStore.EXPORT_COLUMNS
+    ]
+    if with_data:
+        fields.append(pa.field("data", pa.string()))
+    schema = pa.schema(fields)
+    count = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for batch in itertools.batched(rows, CHUNK_SIZE):
+            if with_data:
+                for row in batch:
+                    row["data"] = row["data"].decode()
+            writer.write_batch(pa.RecordBatch.from_pylist(list(batch), schema))
+            count += len(batch)
+    return count
+
+
+def export(
+    service: PropertyService,
+    status: str | None,
+    format: str,
+    out: IO[bytes],
+    with_data: bool,
+) -> int:
+    rows = service.iter_rows(status, with_data=with_data)
+    if format == "ndjson":
+        return write_ndjson(rows, out)
+    if format == "csv":
+        return write_csv(rows, out, with_data)
+    return write_parquet(rows, out, with_data)
+
+
+async def run_and_close(
+    service: PropertyService, job: Coroutine[None, None, None]
+) -> None:
+    try:
+        await job
+    finally:
+        await service.aclose()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DB_NAME, help=f"database (default {DB_NAME})")
+    parser.add_argument("--metrics", type=Path, help="write timings here as JSON")
+    parser.add_argument(
+        "--stream-models",
+        action="store_true",
+        help="stop reading pages after PAGE_MODEL; drops keep-alive connections",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("import", help="scrape and save listings")
+    add.add_argument("source", help="file of IDs or URLs, or - for stdin")
+    add.add_argument("--status", required=True, help="status to save them under")
+    add.add_argument("--site", default="rightmove", help="site that IDs belong to")
+    add.add_argument("--concurrency", type=int, default=8)
+
+    rescrape = commands.add_parser("refresh", help="re-scrape stored listings")
+    rescrape.add_argument("--status", help="only listings with this status")
+    rescrape.add_argument(
+        "--max-age", type=float, help="only listings not scraped for this many seconds"
+    )
+    rescrape.add_argument("--concurrency", type=int, default=8)
+
+    dump = commands.add_parser("export", help="write stored listings out")
+    dump.add_argument("--status", help="only listings with this status")
+    dump.add_argument("--format", choices=FORMATS, help="default from -o, or ndjson")
+    dump.add_argument(
+        "-o", "--output", type=Path, help="file to write (default stdout)"
+    )
+    dump.add_argument(
+        "--data", action="store_true", help="include the full PAGE_MODEL JSON"
+    )
+
+    upgrade = commands.add_parser(
+        "migrate", help="bring the database schema up to date"
+    )
+    upgrade.add_argument(
+        "--checkpoint",
+        type=int,
+        help="commit every this many rows so an interrupted run can resume",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    metrics.enabled = args.metrics is not None
+    if args.command == "migrate":
+        return migrate(args.db, args.checkpoint)
+    service = build_service(
+        args.db, fetch=args.command != "export", stream_models=args.stream_models
+    )
+    try:
+        if args.command == "export":
+            format = args.format
+            if format is None and args.output is not None:
+                format = args.output.suffix.lstrip(".")
+            format = format if format in FORMATS else "ndjson"
+            if format == "parquet":
+                if args.output is None:
+                    raise SystemExit("Parquet export needs an --output file")
+                try:
+                    check_parquet()
+                except ImportError as error:
+                    raise SystemExit(str(error)) from None
+            with ExitStack() as stack:
+                out = sys.stdout.buffer
+                if args.output is not None:
+                    out = stack.enter_context(args.output.open("wb"))
+                count = export(service, args.status, format, out, args.data)
+            print(f"exported {count:,}", file=sys.stderr)
+            return 0
+
+        report = Report()
+        if args.command == "import":
+            site = service.get_site(args.site)
+            with ExitStack() as stack:
+                lines = sys.stdin
+                if args.source != "-":
+                    lines = stack.enter_context(open(args.source))
+                urls = read_urls(lines, site)
+                job = add_urls(service, urls, args.status, report, args.concurrency)
+                asyncio.run(run_and_close(service, job))
+            print(report.summary("imported"), file=sys.stderr)
+        else:
+            job = refresh(service, args.status, args.max_age, report, args.concurrency)
+            asyncio.run(run_and_close(service, job))
+            print(report.summary("refreshed"), file=sys.stderr)
+        return 1 if report.failed else 0
+    finally:
+        service.close()
+        if args.metrics is not None:
+            metrics.dump(args.metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
-from collections.abc import Sequence
-from typing import Protocol
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import AbstractContextManager
+from typing import Any, Protocol
 
 __all__ = [
     "Property",
@@ -18,6 +19,12 @@ class Property(Protocol):
     def __init__(self, data: dict, status: str | None = None) -> None: ...
     @staticmethod
     def supports_url(url: str) -> bool: ...
+    @property
+    def display_address(self) -> str: ...
+    @property
+    def price(self) -> int | None: ...
+    @property
+    def bedrooms(self) -> int | None: ...
 
 
 class PropertySite(Protocol):
@@ -28,29 +35,66 @@ class PropertySite(Protocol):
 
 class PropertyFetcher(Protocol):
     def supports_url(self, url: str) -> bool: ...
-    def fetch(self, url: str) -> str: ...
-    async def fetch_async(self, url: str) -> str: ...
+    def fetch(self, url: str) -> str | bytes: ...
+    async def fetch_async(self, url: str) -> str | bytes: ...
+    def close(self) -> None: ...
+    async def aclose(self) -> None: ...
 
 
 class PropertyParser(Protocol):
     def supports_url(self, url: str) -> bool: ...
-    def parse(self, content: str) -> Property: ...
+    def parse(self, content: str | bytes) -> Property: ...
 
 
 class PropertyStore(Protocol):
     def get_property_constructor(self) -> type[Property]: ...
     def set(self, url: str, property: Property, status: str | None = None) -> str: ...
+    def set_many(
+        self, properties: Iterable[tuple[str, Property]], status: str | None = None
+    ) -> list[str]: ...
+    def refresh(self, url: str, property: Property) -> bool: ...
+    def refresh_many(self, properties: Iterable[tuple[str, Property]]) -> list[str]: ...
+    def transaction(self) -> AbstractContextManager[None]: ...
     def get(self, url: str) -> Property | None: ...
     def delete(self, url: str) -> str: ...
     def update(self, url: str, *args, **kwargs) -> str: ...
     def supports_url(self, url: str) -> bool: ...
+    def list_by_status(
+        self,
+        status: str,
+        after: tuple[str, str] | None = None,
+        limit: int | None = None,
+    ) -> list[dict]: ...
+    def get_image_urls(self, url: str) -> list[str]: ...
+    def search(
+        self,
+        text: str | None = None,
+        *,
+        bounds: tuple[float, float, float, float] | None = None,
+        status: str | None = None,
+        limit: int | None = ...,
+    ) -> list[dict]: ...
+    def list_stale(self, before: float, limit: int | None = None) -> list[dict]: ...
+    def mark_checked(
+        self, urls: Iterable[str], checked_at: float | None = None
+    ) -> None: ...
+    def get_history(self, url: str) -> list[dict]: ...
+    def iter_rows(
+        self,
+        status: str | None = None,
+        *,
+        with_data: bool = ...,
+        batch_size: int = ...,
+    ) -> Iterator[dict]: ...
+    def subscribe(self, listener: Callable[[Any], None]) -> Callable[[], None]: ...
+    def poll_external_changes(self) -> bool: ...
 
 
 class PropertyService(Protocol):
-    sites: Sequence[PropertySite]
-    fetchers: Sequence[PropertyFetcher]
-    parsers: Sequence[PropertyParser]
-    stores: Sequence[PropertyStore]
+    sites: Iterable[PropertySite]
+    fetchers: Iterable[PropertyFetcher]
+    parsers: Iterable[PropertyParser]
+    stores: Iterable[PropertyStore]
 
     def __init__(
         self,
@@ -60,6 +104,87 @@ class PropertyService(Protocol):
         stores: Sequence[PropertyStore],
     ) -> None: ...
     def get_property(self, site_name: str, property_id: str) -> Property: ...
+    async def get_property_async(
+        self, site_name: str, property_id: str
+    ) -> Property: ...
+    async def get_property_at_async(self, url: str) -> Property: ...
+    async def fetch_property_at_async(self, url: str) -> Property: ...
     def add_property(
         self, site_name: str, property_id: str, status: str
     ) -> Property: ...
+    def list_properties(
+        self,
+        status: str,
+        after: tuple[str, str] | None = None,
+        limit: int | None = None,
+    ) -> list[dict]: ...
+    def get_image_urls(self, url: str) -> list[str]: ...
+    def search(
+        self,
+        text: str | None = None,
+        *,
+        bounds: tuple[float, float, float, float] | None = None,
+        status: str | None = None,
+        limit: int | None = ...,
+    ) -> list[dict]: ...
+    def list_stale(self, before: float, limit: int | None = None) -> list[dict]: ...
+    def mark_checked(self, urls: Iterable[str]) -> None: ...
+    def get_history(self, url: str) -> list[dict]: ...
+    def iter_rows(
+        self,
+        status: str | None = None,
+        *,
+        with_data: bool = ...,
+        batch_size: int = ...,
+    ) -> Iterator[dict]: ...
+    def subscribe(self, listener: Callable[[Any], None]) -> Callable[[], None]: ...
+    def poll_changes(self) -> bool: ...
+    def save_properties(
+        self, properties: Sequence[tuple[str, Property]], status: str
+    ) -> list[str]: ...
+    def refresh_properties(
+        self, properties: Sequence[tuple[str, Property]]
+    ) -> list[str]: ...
+    def update_property(self, url: str, **kwargs) -> str: ...
+    def delete_property(self, url: str) -> str: ...
+    def add_properties(
+        self,
+        site_name: str,
+        property_ids: Sequence[str],
+        status: str,
+        *,
+        max_concurrent: int = ...,
+        batch_size: int = ...,
+        progress: Callable[[str, Property | Exception], None] | None = ...,
+    ) -> dict[str, Property | Exception]: ...
+    async def add_properties_async(
+        self,
+        site_name: str,
+        property_ids: Sequence[str],
+        status: str,
+        *,
+        max_concurrent: int = ...,
+        batch_size: int = ...,
+        progress: Callable[[str, Property | Exception], None] | None = ...,
+    ) -> dict[str, Property | Exception]: ...
+    async def add_urls_async(
+        self,
+        urls: Iterable[str],
+        status: str,
+        *,
+        max_concurrent: int = ...,
+        batch_size: int = ...,
+        progress: Callable[[str, Property | Exception], None] | None = ...,
+        saved: Callable[[list[str]], None] | None = ...,
+    ) -> dict[str, Property | Exception]: ...
+    async def refresh_urls_async(
+        self,
+        urls: Iterable[str],
+        *,
+        max_concurrent: int = ...,
+        batch_size: int = ...,
+        progress: Callable[[str, Property | Exception], None] | None = ...,
+        saved: Callable[[list[str]], None] | None = ...,
+    ) -> dict[str, Property | Exception]: ...
+    def close(self) -> None: ...
+    async def aclose(self) -> None: ...
@@ -1,3 +1,4 @@
 from .main_screen import MainScreen
+from .metrics_screen import MetricsScreen
 
-__all__ = ["MainScreen"]
+__all__ = ["MainScreen", "MetricsScreen"]
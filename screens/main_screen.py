@@ -1,10 +1,12 @@
+import asyncio
 import typing
+from datetime import datetime
 
 from textual.app import ComposeResult
 from textual.containers import Container, Horizontal, Vertical, VerticalScroll
 from textual.reactive import reactive, var
 from textual.screen import Screen
-from textual.widgets import Footer, Header
+from textual.widgets import Footer, Header, Input, ProgressBar, Static
 from textual_image.widget import Image
 
 from widgets import IDS, HouseList
@@ -15,14 +17,25 @@ if typing.TYPE_CHECKING:
 __all__ = ["MainScreen"]
 
 
+def format_price(price: int | None) -> str:
+    return f"£{price:,}" if price else "Price on request"
+
+
 class MainContainer(Container):
     BORDER_TITLE = "Rightmove Properties"
 
     def compose(self) -> ComposeResult:
         lists = [HouseList(id=id) for id in IDS]
+        yield Input(
+            id="search", placeholder="Filter by address, description or feature"
+        )
         yield Horizontal(
             Vertical(*lists, id="house-lists"),
-            DetailContainer(Image(id="gallery-main"), id="detail-container"),
+            DetailContainer(
+                Static(id="detail-summary"),
+                Image(id="gallery-main"),
+                id="detail-container",
+            ),
         )
 
 
@@ -30,19 +43,134 @@ class DetailContainer(VerticalScroll):
     BORDER_TITLE = "Details"
     main_image_index: reactive[int] = reactive(1, always_update=True)
     n_images: var[int] = var(0)
+    image_urls: var[list[str]] = var(list)
+
+    def on_house_list_house_selection_changed(
+        self, message: HouseList.HouseSelectionChanged
+    ) -> None:
+        self.image_urls = self.app.service.get_image_urls(message.url)
+        self.n_images = len(self.image_urls)
+        self.main_image_index = 1
+        self.run_worker(
+            self.show_details(message.url),
+            group="details",
+            exclusive=True,
+            exit_on_error=False,
+        )
+
+    async def show_details(self, url: str) -> None:
+        service = self.app.service
+        property = await service.get_property_at_async(url)
+        lines = [
+            property.display_address,
+            f"{format_price(property.price)} · {property.bedrooms} bedrooms",
+        ]
+        history = service.get_history(url)
+        if len(history) > 1:
+            for entry in history:
+                day = datetime.fromtimestamp(entry["recorded_at"]).strftime("%d %b %Y")
+                listing_status = entry["listing_status"] or ""
+                lines.append(
+                    f"{day}  {format_price(entry['price'])}  {listing_status}".rstrip()
+                )
+        self.query_one("#detail-summary", Static).update("\n".join(lines))
+
+    def watch_main_image_index(self, index: int) -> None:
+        if self.image_urls:
+            self.run_worker(self.show_image(index), group="gallery", exclusive=True)
+
+    async def show_image(self, index: int) -> None:
+        # Already loaded by the fetcher; importing at the top slows startup.
+        import httpx
+
+        urls = self.image_urls
+        images = self.app.images
+        if images is None:
+            return
+        images.prefetch([urls[index % len(urls)], urls[index - 2]])
+        try:
+            image = await images.get(urls[index - 1])
+        except (httpx.HTTPError, OSError):
+            return
+        self.query_one("#gallery-main", Image).image = image
 
 
 class MainScreen(Screen):
-    BINDINGS = [("n", "next_image", "Next Image"), ("p", "prev_image", "Prev Image")]
+    # Seconds of quiet in the search box before the search runs.
+    SEARCH_DELAY = 0.25
+    # Start on the lists, not the search box, so single-key bindings work.
+    AUTO_FOCUS = "HouseList"
+    BINDINGS = [
+        ("n", "next_image", "Next Image"),
+        ("p", "prev_image", "Prev Image"),
+        ("/", "focus_search", "Search"),
+    ]
 
     def compose(self) -> ComposeResult:
         yield MainContainer()
+        yield ProgressBar(id="import-progress", show_eta=False)
         yield Footer()
         yield Header()
 
+    def on_mount(self) -> None:
+        self.set_interval(2.0, self.check_external_changes)
+
+    def check_external_changes(self) -> None:
+        service = self.app.service
+        if service is not None and service.poll_changes():
+            self.search(self.query_one("#search", Input).value.strip(), delay=0)
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        if event.input.id == "search":
+            self.search(event.value.strip())
+
+    def search(self, text: str, delay: float | None = None) -> None:
+        """Filter every list by `text`, or reload them all if it is empty."""
+        if not text:
+            self.workers.cancel_group(self, "search")
+            for house_list in self.query(HouseList):
+                house_list.load_data()
+            return
+        # Each keystroke cancels the search still waiting out its delay.
+        self.run_worker(
+            self.run_search(text, self.SEARCH_DELAY if delay is None else delay),
+            group="search",
+            exclusive=True,
+            exit_on_error=False,
+        )
+
+    async def run_search(self, text: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        service = self.app.service
+        if service is None:
+            return
+        lists = list(self.query(HouseList))
+        statuses = [house_list.id or "" for house_list in lists]
+
+        # A query per list, so a large status can't crowd the others out of a
+        # shared limit. All of them run in one trip off the event loop.
+        def search_lists() -> dict[str, list[dict]]:
+            return {
+                status: service.search(
+                    text, status=status, limit=HouseList.SEARCH_LIMIT
+                )
+                for status in statuses
+            }
+
+        by_status = await asyncio.to_thread(search_lists)
+        for house_list, status in zip(lists, statuses):
+            house_list.show_results(text, by_status[status])
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.input.id == "search":
+            self.query(HouseList).first().focus()
+
+    def action_focus_search(self) -> None:
+        self.query_one("#search", Input).focus()
+
     def action_next_image(self) -> None:
         container = self.query_one(DetailContainer)
-        if container.main_image_index < container.n_images + 1:
+        if container.main_image_index < container.n_images:
             container.main_image_index += 1
         else:
             container.main_image_index = 1
@@ -50,6 +178,6 @@ class MainScreen(Screen):
     def action_prev_image(self) -> None:
         container = self.query_one(DetailContainer)
         if container.main_image_index == 1:
-            container.main_image_index = container.n_images + 1
+            container.main_image_index = container.n_images
         else:
             container.main_image_index -= 1
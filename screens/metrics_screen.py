@@ -0,0 +1,84 @@
+from textual.app import ComposeResult
+from textual.containers import Container
+from textual.screen import ModalScreen
+from textual.widgets import DataTable, Footer, Static
+
+from utils.metrics import metrics
+
+__all__ = ["MetricsScreen"]
+
+DUMP_PATH = "metrics.json"
+
+
+class MetricsScreen(ModalScreen[None]):
+    """Live stage timings, counters and in-flight requests."""
+
+    BINDINGS = [
+        ("q,escape", "dismiss", "Close"),
+        ("e", "toggle", "Enable/Disable"),
+        ("r", "reset", "Reset"),
+        ("s", "save", "Save JSON"),
+    ]
+
+    def compose(self) -> ComposeResult:
+        container = Container(
+            Static(id="metrics-status"),
+            DataTable(id="metrics-stages", cursor_type="none"),
+            DataTable(id="metrics-counters", cursor_type="none"),
+        )
+        container.border_title = "Metrics"
+        yield container
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.query_one("#metrics-stages", DataTable).add_columns(
+            "stage", "count", "mean ms", "p50 ms", "p95 ms", "max ms", "total s"
+        )
+        self.query_one("#metrics-counters", DataTable).add_columns("counter", "value")
+        self.refresh_tables()
+        self.set_interval(1, self.refresh_tables)
+
+    def refresh_tables(self) -> None:
+        snapshot = metrics.snapshot()
+        state = "on" if snapshot["enabled"] else "off (press e to enable)"
+        status = f"Recording {state} · {snapshot['uptime_s']:.0f}s"
+        ratios = [
+            ("property cache", "property_cache.hit", "property_cache.miss"),
+            ("http cache", "http_cache.hit", "http_cache.miss"),
+        ]
+        for name, hits, misses in ratios:
+            ratio = metrics.ratio(hits, misses)
+            if ratio is not None:
+                status += f" · {name} {ratio:.0%} hits"
+        self.query_one("#metrics-status", Static).update(status)
+
+        stages = self.query_one("#metrics-stages", DataTable)
+        stages.clear()
+        for stage, row in snapshot["stages"].items():
+            stages.add_row(
+                stage,
+                row["count"],
+                f"{row['mean_ms']:.2f}",
+                f"{row['p50_ms']:.2f}",
+                f"{row['p95_ms']:.2f}",
+                f"{row['max_ms']:.2f}",
+                f"{row['total_ms'] / 1e3:.2f}",
+            )
+        counters = self.query_one("#metrics-counters", DataTable)
+        counters.clear()
+        for name, value in snapshot["counters"].items():
+            counters.add_row(name, f"{value:,}")
+        for name, value in snapshot["in_flight"].items():
+            counters.add_row(f"{name} in flight", f"{value:,}")
+
+    def action_toggle(self) -> None:
+        metrics.enabled = not metrics.enabled
+        self.refresh_tables()
+
+    def action_reset(self) -> None:
+        metrics.reset()
+        self.refresh_tables()
+
+    def action_save(self) -> None:
+        path = metrics.dump(DUMP_PATH)
+        self.notify(f"Metrics written to {path}")
@@ -0,0 +1,11 @@
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="session")
+def content() -> bytes:
+    """A saved Rightmove listing page."""
+    return (ROOT / "content.html").read_bytes()
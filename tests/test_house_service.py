@@ -0,0 +1,50 @@
+import pytest
+
+from utils.house_service import HouseService
+from utils.rightmove import RightMove, RightMoveParser, RightMoveStore
+
+URL = RightMove.get_property_url("1")
+
+
+class CountingStore(RightMoveStore):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.reads = 0
+
+    def get_image_urls(self, url: str) -> list[str]:
+        self.reads += 1
+        return super().get_image_urls(url)
+
+    def get_history(self, url: str) -> list[dict]:
+        self.reads += 1
+        return super().get_history(url)
+
+
+@pytest.fixture
+def service(tmp_path, content):
+    store = CountingStore(tmp_path / "houses.db")
+    service = HouseService([RightMove()], [], [RightMoveParser()], [store])
+    service.save_property(URL, RightMoveParser().parse(content), "to-review")
+    yield service
+    store.conn.close()
+
+
+def test_image_urls_and_history_are_cached(service):
+    store = service.get_store(URL)
+    image_urls = service.get_image_urls(URL)
+    history = service.get_history(URL)
+    assert image_urls and history
+    assert service.get_image_urls(URL) == image_urls
+    assert service.get_history(URL) == history
+    assert store.reads == 2
+
+
+def test_writes_invalidate_cached_lists(service, content):
+    store = service.get_store(URL)
+    service.get_image_urls(URL)
+    service.delete_property(URL)
+    assert service.get_image_urls(URL) == []
+    service.refresh_properties([(URL, RightMoveParser().parse(content))])
+    service.save_properties([(URL, RightMoveParser().parse(content))], "to-view")
+    assert service.get_image_urls(URL)
+    assert store.reads == 3
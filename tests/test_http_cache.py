@@ -0,0 +1,55 @@
+import pytest
+
+from utils.http_cache import ResponseCache
+
+URL = "https://www.rightmove.co.uk/properties/1"
+OTHER = "https://www.rightmove.co.uk/properties/2"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(tmp_path)
+    yield cache
+    cache.close()
+
+
+def test_same_body_stored_twice(cache):
+    cache.put(URL, b"<html>1</html>", {"etag": '"a"'})
+    cache.put(URL, b"<html>1</html>", {"etag": '"b"'})
+    cached = cache.get(URL)
+    assert cached is not None
+    assert cached.body == b"<html>1</html>"
+    assert cached.etag == '"b"'
+    assert cache.request_headers(URL) == {"If-None-Match": '"b"'}
+
+
+def test_changed_body_replaces_file(cache):
+    cache.put(URL, b"old", {"etag": '"a"'})
+    cache.put(URL, b"new", {"etag": '"b"'})
+    assert cache.get(URL).body == b"new"
+    assert cache.size() == 3
+    assert [path.name for path in cache.objects.rglob("*") if path.is_file()] == [
+        cache.conn.execute("select digest from responses").fetchone()[0]
+    ]
+
+
+def test_shared_body_kept_until_last_url_goes(cache):
+    cache.put(URL, b"same", {"etag": '"a"'})
+    cache.put(OTHER, b"same", {"etag": '"a"'})
+    cache.put(URL, b"changed", {"etag": '"b"'})
+    assert cache.get(OTHER).body == b"same"
+
+
+def test_stores_responses_without_validators(cache):
+    cache.put(URL, b"body", {})
+    assert cache.get(URL).body == b"body"
+    assert cache.request_headers(URL) == {}
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10)
+    cache.put(URL, b"123456", {})
+    cache.put(OTHER, b"abcdef", {})
+    assert cache.get(URL) is None
+    assert cache.get(OTHER).body == b"abcdef"
+    cache.close()
@@ -0,0 +1,115 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from utils.rightmove import RightMove, RightMoveStore
+
+ROOT = Path(__file__).parent.parent
+N_ROWS = 25
+STATUSES = ("to-review", "to-view", "viewed-yes", "viewed-no")
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def legacy(tmp_path, monkeypatch):
+    """A property_number-keyed database like houses.db, in small batches."""
+    monkeypatch.setattr(RightMoveStore, "MIGRATION_BATCH", 4)
+    source = sqlite3.connect(ROOT / "houses.db")
+    pages = [row[0] for row in source.execute("select data from houses")]
+    source.close()
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "create table houses (property_number text primary key, status text, data JSON)"
+    )
+    conn.executemany(
+        "insert into houses values (?, ?, ?)",
+        ((str(100 + i), STATUSES[i % 4], pages[i % len(pages)]) for i in range(N_ROWS)),
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def tables(store: RightMoveStore) -> set[str]:
+    rows = store.conn.execute("select name from sqlite_master where type = 'table'")
+    return {row[0] for row in rows}
+
+
+def interrupt_after(rows: int):
+    def progress(migration, done: int) -> None:
+        if migration.version == 4 and done >= rows:
+            raise Interrupted
+
+    return progress
+
+
+def expected_rows() -> dict[str, str]:
+    return {
+        RightMove.get_property_url(str(100 + i)): STATUSES[i % 4] for i in range(N_ROWS)
+    }
+
+
+def test_imports_legacy_rows(legacy):
+    store = RightMoveStore(legacy)
+    assert store.schema_version == 4
+    rows = list(store.iter_rows())
+    assert {row["url"]: row["status"] for row in rows} == expected_rows()
+    assert all(row["display_address"] for row in rows)
+    assert "legacy_houses" not in tables(store)
+    assert (
+        store.conn.execute("select * from schema_migration_progress").fetchall() == []
+    )
+    url = rows[0]["url"]
+    assert store.get_image_urls(url) == list(store.get(url).image_urls)
+    assert store.search(rows[0]["display_address"].split()[0])
+
+
+def test_interrupted_migration_rolls_back(legacy):
+    store = RightMoveStore(legacy, migrate=False)
+    with pytest.raises(Interrupted):
+        store.migrate(progress=interrupt_after(8))
+    assert store.schema_version == 0
+    assert tables(store) == {"houses"}
+    assert store.conn.execute("select count(*) from houses").fetchone()[0] == N_ROWS
+
+
+def test_checkpointed_migration_resumes(legacy):
+    store = RightMoveStore(legacy, migrate=False)
+    with pytest.raises(Interrupted):
+        store.migrate(checkpoint=8, progress=interrupt_after(12))
+    store.conn.close()
+
+    store = RightMoveStore(legacy, migrate=False)
+    # Steps 1-3 and the first 8 imported rows were committed.
+    assert store.schema_version == 3
+    assert store.conn.execute("select count(*) from houses").fetchone()[0] == 8
+    resumed = []
+    applied = store.migrate(
+        checkpoint=8, progress=lambda migration, done: resumed.append(done)
+    )
+    assert [migration.version for migration in applied] == [4]
+    assert resumed[-1] == N_ROWS - 8
+    assert store.schema_version == 4
+    assert {row["url"]: row["status"] for row in store.iter_rows()} == expected_rows()
+    assert "legacy_houses" not in tables(store)
+
+
+def test_reopening_current_database(legacy):
+    RightMoveStore(legacy).conn.close()
+    store = RightMoveStore(legacy, migrate=False)
+    assert store.schema_version == 4
+    assert store.migrate() == []
+    assert len(list(store.iter_rows())) == N_ROWS
+    store.conn.close()
+    assert len(list(RightMoveStore(legacy).iter_rows())) == N_ROWS
+
+
+def test_new_database(tmp_path):
+    store = RightMoveStore(tmp_path / "new.db")
+    assert store.schema_version == 4
+    assert list(store.iter_rows()) == []
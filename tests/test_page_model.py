@@ -0,0 +1,119 @@
+import orjson
+import pytest
+import regex
+
+from utils.page_model import (
+    ModelStream,
+    find_model,
+    find_models,
+    load_model,
+    load_models,
+)
+
+
+def regex_page_model(content: str) -> dict:
+    """The recursive pattern page_model replaced."""
+    pattern = r"window\.PAGE_MODEL\s*=\s*(\{(?:[^{}]|(?1))*\})"
+    match_ = regex.search(pattern, content, regex.DOTALL)
+    return orjson.loads(match_.group(1))
+
+
+def page(script: str) -> str:
+    return f"<html><script>{script}</script></html>"
+
+
+def test_matches_regex_on_saved_page(content):
+    expected = regex_page_model(content.decode())
+    assert load_model(content) == expected
+    assert load_model(content.decode()) == expected
+
+
+def test_span_covers_object(content):
+    start, end = find_model(content)
+    assert content[start : start + 1] == b"{"
+    assert content[end - 1 : end] == b"}"
+    assert find_models(content)["PAGE_MODEL"] == (start, end)
+
+
+def test_braces_inside_strings():
+    model = {"text": 'a } and a { and "}" and \\', "nested": {"x": "{{"}}
+    content = page(f"window.PAGE_MODEL = {orjson.dumps(model).decode()};")
+    assert load_model(content) == model
+    assert load_model(content.encode()) == model
+
+
+def test_skips_marker_without_assignment():
+    content = page(
+        'if (window.PAGE_MODEL) {} window.PAGE_MODEL = {"a": 1}; window.x = {}'
+    )
+    assert load_model(content) == {"a": 1}
+
+
+def test_missing_model():
+    with pytest.raises(ValueError, match="PAGE_MODEL"):
+        find_model(page("window.adInfo = {}"))
+
+
+def test_unterminated_model():
+    with pytest.raises(ValueError, match="not terminated"):
+        find_model(page('window.PAGE_MODEL = {"a": {"b": 1}'))
+
+
+def test_find_models_on_saved_page(content):
+    models = load_models(content)
+    assert {"PAGE_MODEL", "adInfo"} <= models.keys()
+    assert models["PAGE_MODEL"] == load_model(content)
+    assert load_models(content, {"adInfo"}).keys() == {"adInfo"}
+
+
+def test_find_models_keeps_first_assignment():
+    content = page('window.a = {"n": 1}; window.b = {"s": "}"}; window.a = {"n": 2}')
+    assert load_models(content) == {"a": {"n": 1}, "b": {"s": "}"}}
+
+
+def stream(content: bytes, size: int, name: str = "PAGE_MODEL") -> ModelStream:
+    model_stream = ModelStream(name)
+    for offset in range(0, len(content), size):
+        if model_stream.feed(content[offset : offset + size]):
+            break
+    return model_stream
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 4096])
+def test_stream_matches_find_model(content, size):
+    model_stream = stream(content, size)
+    assert model_stream.done
+    assert load_model(model_stream.model) == load_model(content)
+    # Reading stops at the closing brace rather than the end of the page.
+    assert model_stream.bytes_read < len(content)
+
+
+@pytest.mark.parametrize("size", [1, 2, 5])
+def test_stream_braces_inside_strings(size):
+    model = {"a": '} "{" \\" }}', "b": [{"c": "{"}], "d": "\\"}
+    content = page(f"window.PAGE_MODEL = {orjson.dumps(model).decode()};").encode()
+    model_stream = stream(content, size)
+    assert model_stream.done
+    assert load_model(model_stream.model) == model
+
+
+@pytest.mark.parametrize("size", [1, 4, 11, 1000])
+def test_stream_marker_split_across_chunks(size):
+    content = page('window.PAGE_MODE = {}; window.PAGE_MODEL = {"a": 1}').encode()
+    assert load_model(stream(content, size).model) == {"a": 1}
+
+
+def test_stream_without_marker():
+    model_stream = stream(page("window.adInfo = {}" + " " * 10_000).encode(), 100)
+    assert not model_stream.done
+    # Only a marker-sized tail is kept while searching.
+    assert len(model_stream._buffer) < len(model_stream.marker)
+    with pytest.raises(ValueError, match="PAGE_MODEL"):
+        model_stream.model
+
+
+def test_stream_unterminated_model():
+    model_stream = stream(page('window.PAGE_MODEL = {"a": {"b": "}"}').encode(), 3)
+    assert not model_stream.done
+    with pytest.raises(ValueError):
+        model_stream.model
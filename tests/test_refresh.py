@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+import cli
+
+from utils.house_service import HouseService
+from utils.refresh import RefreshScheduler
+from utils.rightmove import RightMove, RightMoveParser, RightMoveStore
+
+URLS = [RightMove.get_property_url(id) for id in ("1", "2", "3")]
+
+
+class SlowFetcher:
+    """Serves the saved page once `release` is set."""
+
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+        self.release = asyncio.Event()
+
+    def supports_url(self, url: str) -> bool:
+        return True
+
+    async def fetch_async(self, url: str) -> bytes:
+        await self.release.wait()
+        return self.content
+
+    async def aclose(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def store(tmp_path, content):
+    store = RightMoveStore(tmp_path / "houses.db")
+    house = RightMoveParser().parse(content)
+    store.set_many([(url, house) for url in URLS], "to-review")
+    yield store
+    store.conn.close()
+
+
+def test_refresh_keeps_moves_and_deletes(store, content):
+    fetcher = SlowFetcher(content)
+    service = HouseService([RightMove()], [fetcher], [RightMoveParser()], [store])
+    scheduler = RefreshScheduler(service, max_age=0, rate=1000)
+
+    async def run() -> None:
+        refreshing = asyncio.create_task(scheduler.refresh_once())
+        await asyncio.sleep(0.01)
+        service.update_property(URLS[0], status="viewed-yes")
+        service.delete_property(URLS[1])
+        fetcher.release.set()
+        results = await refreshing
+        assert set(results) == set(URLS)
+
+    asyncio.run(run())
+    assert store.get_summary(URLS[0])["status"] == "viewed-yes"
+    assert store.get(URLS[1]) is None
+    assert store.get_summary(URLS[2])["status"] == "to-review"
+    assert store.list_stale(0) == []
+
+
+def test_refresh_many_skips_missing(store, content):
+    house = RightMoveParser().parse(content)
+    missing = RightMove.get_property_url("4")
+    assert store.refresh_many([(URLS[0], house), (missing, house)]) == [URLS[0]]
+    assert store.get(missing) is None
+    assert not store.refresh(missing, house)
+
+
+def test_cli_refresh_keeps_moves_and_deletes(store, content):
+    fetcher = SlowFetcher(content)
+    service = HouseService([RightMove()], [fetcher], [RightMoveParser()], [store])
+    report = cli.Report()
+
+    async def run() -> None:
+        refreshing = asyncio.create_task(cli.refresh(service, None, None, report, 4))
+        await asyncio.sleep(0.01)
+        service.update_property(URLS[0], status="viewed-no")
+        service.delete_property(URLS[1])
+        fetcher.release.set()
+        await refreshing
+
+    asyncio.run(run())
+    assert report.saved == len(URLS) - 1
+    assert report.skipped == 1
+    assert report.summary("refreshed") == "refreshed 2, failed 0, skipped 1 deleted"
+    assert store.get_summary(URLS[0])["status"] == "viewed-no"
+    assert store.get(URLS[1]) is None
+    assert store.get_summary(URLS[2])["status"] == "to-review"
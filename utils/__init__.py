@@ -1,11 +1,25 @@
-from .house_service import HouseService
-from .rightmove import (
-    RightMove,
-    RightMoveFetcher,
-    RightMoveParser,
-    RightMoveProperty,
-    RightMoveStore,
-)
+"""Services behind the app and CLI.
+
+Names are imported from their modules on first access, so importing
+`utils.changes` does not also pull in httpx, SQLite or Pillow.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .fetch_policy import FetchPolicy
+    from .house_service import HouseService
+    from .http_cache import ResponseCache
+    from .images import ImageService
+    from .refresh import RefreshScheduler
+    from .rightmove import (
+        RightMove,
+        RightMoveParser,
+        RightMoveProperty,
+        RightMoveStore,
+    )
+    from .rightmove_fetcher import RightMoveFetcher
 
 __all__ = [
     "RightMoveFetcher",
@@ -14,4 +28,34 @@ __all__ = [
     "HouseService",
     "RightMoveStore",
     "RightMoveProperty",
+    "ResponseCache",
+    "ImageService",
+    "RefreshScheduler",
+    "FetchPolicy",
 ]
+
+_MODULES = {
+    "RightMoveFetcher": ".rightmove_fetcher",
+    "RightMoveParser": ".rightmove",
+    "RightMove": ".rightmove",
+    "HouseService": ".house_service",
+    "RightMoveStore": ".rightmove",
+    "RightMoveProperty": ".rightmove",
+    "ResponseCache": ".http_cache",
+    "ImageService": ".images",
+    "RefreshScheduler": ".refresh",
+    "FetchPolicy": ".fetch_policy",
+}
+
+
+def __getattr__(name: str):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,45 @@
+from collections.abc import Callable
+from enum import StrEnum
+from typing import NamedTuple
+
+__all__ = ["ChangeFeed", "ChangeKind", "ChangeListener", "PropertyChange"]
+
+
+class ChangeKind(StrEnum):
+    INSERTED = "inserted"
+    UPDATED = "updated"
+    STATUS_CHANGED = "status-changed"
+    DELETED = "deleted"
+
+
+class PropertyChange(NamedTuple):
+    kind: ChangeKind
+    url: str
+    status: str | None
+    old_status: str | None = None
+    summary: dict | None = None
+
+
+ChangeListener = Callable[[PropertyChange], None]
+
+
+class ChangeFeed:
+    """In-process publisher of store changes.
+
+    Listeners run synchronously in the thread that committed the write.
+    """
+
+    def __init__(self) -> None:
+        self._listeners: list[ChangeListener] = []
+
+    def subscribe(self, listener: ChangeListener) -> Callable[[], None]:
+        self._listeners.append(listener)
+        return lambda: self.unsubscribe(listener)
+
+    def unsubscribe(self, listener: ChangeListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def publish(self, change: PropertyChange) -> None:
+        for listener in list(self._listeners):
+            listener(change)
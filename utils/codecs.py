@@ -0,0 +1,91 @@
+"""Compression codecs for stored property payloads."""
+
+import zlib
+from collections.abc import Sequence
+from typing import Protocol
+
+__all__ = ["PayloadCodec", "ZlibCodec", "ZstdCodec", "get_codec", "train_dictionary"]
+
+# zlib only looks back 32 KiB, so a larger preset dictionary is wasted.
+ZLIB_DICTIONARY_SIZE = 32 * 1024
+
+
+class PayloadCodec(Protocol):
+    name: str
+
+    def compress(self, data: bytes) -> bytes: ...
+    def decompress(self, data: bytes) -> bytes: ...
+
+
+class ZlibCodec:
+    name = "zlib"
+
+    def __init__(self, level: int = 6, dictionary: bytes | None = None) -> None:
+        self.level = level
+        self.dictionary = dictionary
+
+    def compress(self, data: bytes) -> bytes:
+        if self.dictionary is None:
+            return zlib.compress(data, self.level)
+        compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.dictionary is None:
+            return zlib.decompress(data)
+        decompressor = zlib.decompressobj(zdict=self.dictionary)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+class ZstdCodec:
+    name = "zstd"
+
+    def __init__(self, level: int = 3, dictionary: bytes | None = None) -> None:
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError(
+                "zstd compression requires the zstandard package"
+            ) from error
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+        self.dictionary = dictionary
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+CODECS: dict[str, type[ZlibCodec] | type[ZstdCodec]] = {
+    ZlibCodec.name: ZlibCodec,
+    ZstdCodec.name: ZstdCodec,
+}
+
+
+def get_codec(name: str, dictionary: bytes | None = None) -> PayloadCodec:
+    if name not in CODECS:
+        raise ValueError(f"Unknown compression codec: {name}")
+    return CODECS[name](dictionary=dictionary)
+
+
+def train_dictionary(
+    name: str, samples: Sequence[bytes], size: int = 64 * 1024
+) -> bytes:
+    """Build a shared dictionary for `name` from sample payloads.
+
+    zstd trains a real dictionary. zlib has no trainer, so it uses the tail of
+    a sample: that is the part zlib's 32 KiB window can actually reach.
+    """
+    if not samples:
+        raise ValueError("Need at least one sample to build a dictionary")
+    if name == ZstdCodec.name:
+        import zstandard
+
+        return zstandard.train_dictionary(size, list(samples)).as_bytes()
+    if name == ZlibCodec.name:
+        sample = max(samples, key=len)
+        return sample[-min(size, ZLIB_DICTIONARY_SIZE) :]
+    raise ValueError(f"Unknown compression codec: {name}")
@@ -0,0 +1,248 @@
+"""Rate limits, retries and circuit breaking shared by every request to a host."""
+
+import asyncio
+import itertools
+import random
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple
+
+import httpx
+
+from .metrics import metrics
+from .registry import url_host
+
+__all__ = ["CircuitOpenError", "FetchPolicy", "TokenBucket"]
+
+# Statuses worth another attempt. 429 and 503 also slow the host down.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending while a host's circuit breaker is open."""
+
+
+class TokenBucket:
+    """A per-host request rate that halves on pushback and creeps back up.
+
+    `reserve` books the next slot and returns how long to wait for it, so the
+    same bucket serves both sync and async callers.
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._hold_until = 0.0
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        return max(wait, self._hold_until - now)
+
+    def hold(self, delay: float) -> None:
+        """Send nothing for `delay` seconds and halve the rate."""
+        self._hold_until = max(self._hold_until, time.monotonic() + delay)
+        self.rate = max(self.min_rate, self.rate / 2)
+
+    def recover(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, reset_after: float) -> None:
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    def check(self, host: str) -> None:
+        # Once `reset_after` has passed, requests are let through again; the
+        # first failure re-opens the circuit, the first success closes it.
+        if self.opened_at is not None:
+            remaining = self.opened_at + self.reset_after - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(
+                    f"Circuit open for {host}, retry in {remaining:.0f}s"
+                )
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class _Host(NamedTuple):
+    bucket: TokenBucket | None
+    breaker: CircuitBreaker
+
+
+class FetchPolicy:
+    """How hard to push each host, and what to do when it pushes back.
+
+    Each host gets a token bucket of `rate` requests a second (None for no
+    limit), at most `max_per_host` requests in flight and a circuit breaker
+    that opens after `failure_threshold` consecutive failures. `max_concurrent`
+    caps requests across all hosts. Transport errors, 429s and 5xxs are retried
+    up to `retries` times with jittered exponential backoff, or after the
+    server's `Retry-After` when it sends one.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float | None = 4.0,
+        burst: float = 8,
+        min_rate: float = 0.2,
+        max_concurrent: int | None = 16,
+        max_per_host: int | None = 6,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+        failure_threshold: int = 5,
+        reset_after: float = 30.0,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._hosts: dict[str, _Host] = {}
+        self._semaphores: dict[str | None, asyncio.Semaphore | nullcontext] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _host(self, host: str) -> _Host:
+        state = self._hosts.get(host)
+        if state is None:
+            bucket = None
+            if self.rate is not None:
+                bucket = TokenBucket(self.rate, self.burst, self.min_rate)
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_after)
+            state = self._hosts[host] = _Host(bucket, breaker)
+        return state
+
+    def _semaphore(self, host: str | None) -> asyncio.Semaphore | nullcontext:
+        """The per-host cap, or the global one for `host=None`."""
+        # Semaphores belong to the loop that first waits on them, so they are
+        # rebuilt if the policy is reused from another event loop.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphores.clear()
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            limit = self.max_concurrent if host is None else self.max_per_host
+            semaphore = nullcontext() if limit is None else asyncio.Semaphore(limit)
+            self._semaphores[host] = semaphore
+        return semaphore
+
+    async def run[T](self, url: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Await `attempt()` for `url` under the policy, retrying what's worth it."""
+        host = url_host(url)
+        state = self._host(host)
+        for number in itertools.count():
+            state.breaker.check(host)
+            async with self._semaphore(host):
+                if state.bucket is not None:
+                    await asyncio.sleep(self._wait(state.bucket))
+                async with self._semaphore(None):
+                    try:
+                        result = await attempt()
+                    except (httpx.TransportError, httpx.HTTPStatusError) as error:
+                        delay = self._failed(state, error, number)
+                        if delay is None:
+                            raise
+                    else:
+                        self._succeeded(state)
+                        return result
+            await asyncio.sleep(delay)
+
+    def run_sync[T](self, url: str, attempt: Callable[[], T]) -> T:
+        """`run` for blocking callers.
+
+        The rate limit, breaker and retries with backoff apply. The concurrency
+        caps do not, since a blocking caller only makes one request at a time.
+        """
+        host = url_host(url)
+        state = self._host(host)
+        for number in itertools.count():
+            state.breaker.check(host)
+            if state.bucket is not None:
+                time.sleep(self._wait(state.bucket))
+            try:
+                result = attempt()
+            except (httpx.TransportError, httpx.HTTPStatusError) as error:
+                delay = self._failed(state, error, number)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            else:
+                self._succeeded(state)
+                return result
+
+    def _wait(self, bucket: TokenBucket) -> float:
+        wait = bucket.reserve()
+        if wait > 0:
+            metrics.observe("fetch.throttled", wait)
+        return wait
+
+    def _succeeded(self, state: _Host) -> None:
+        state.breaker.record_success()
+        if state.bucket is not None:
+            state.bucket.recover()
+
+    def _failed(
+        self, state: _Host, error: httpx.HTTPError, number: int
+    ) -> float | None:
+        """Return how long to wait before retrying, or None to give up."""
+        retry_after = None
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status not in RETRY_STATUSES:
+                # The host answered properly; the request itself was bad.
+                state.breaker.record_success()
+                return None
+            retry_after = parse_retry_after(error.response.headers.get("Retry-After"))
+            if status in THROTTLE_STATUSES and state.bucket is not None:
+                state.bucket.hold(retry_after or self.backoff)
+        state.breaker.record_failure()
+        if number >= self.retries or state.breaker.opened_at is not None:
+            metrics.count("fetch.gave_up")
+            return None
+        metrics.count("fetch.retried")
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**number))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a `Retry-After` header, in either of its forms."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
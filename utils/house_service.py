@@ -1,4 +1,7 @@
-from collections.abc import Sequence
+import asyncio
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor
+from typing import Self
 
 from protocols import (
     Property,
@@ -8,7 +11,15 @@ from protocols import (
     PropertyStore,
 )
 
-__all__ = ["HouseService"]
+from .changes import ChangeListener
+from .metrics import metrics
+from .parse_pool import ParsePool
+from .property_cache import PropertyCache
+from .registry import ComponentRegistry, load_site_plugins
+
+__all__ = ["HouseService", "ProgressCallback"]
+
+ProgressCallback = Callable[[str, Property | Exception], None]
 
 
 class HouseService:
@@ -18,11 +29,64 @@ class HouseService:
         fetchers: Sequence[PropertyFetcher],
         parsers: Sequence[PropertyParser],
         stores: Sequence[PropertyStore],
+        parse_executor: Executor | None = None,
+        parse_chunk_size: int = 8,
+        cache: PropertyCache | None = None,
     ) -> None:
-        self.sites: Sequence[PropertySite] = sites
-        self.fetchers: Sequence[PropertyFetcher] = fetchers
-        self.parsers: Sequence[PropertyParser] = parsers
-        self.stores: Sequence[PropertyStore] = stores
+        self.sites: list[PropertySite] = []
+        self.fetchers: ComponentRegistry[PropertyFetcher] = ComponentRegistry("fetcher")
+        self.parsers: ComponentRegistry[PropertyParser] = ComponentRegistry("parser")
+        self.stores: ComponentRegistry[PropertyStore] = ComponentRegistry("store")
+        self._sites_by_name: dict[str, PropertySite] = {}
+        for site in sites:
+            self.register(site=site)
+        for fetcher in fetchers:
+            self.register(fetcher=fetcher)
+        for parser in parsers:
+            self.register(parser=parser)
+        for store in stores:
+            self.register(store=store)
+        self.parse_pool: ParsePool | None = None
+        if parse_executor is not None:
+            self.parse_pool = ParsePool(parse_executor, parse_chunk_size)
+        self.cache: PropertyCache = cache if cache is not None else PropertyCache()
+        # Read on every cursor move in the TUI, so kept alongside the properties
+        # and dropped with them.
+        self.image_url_cache: PropertyCache[list[str]] = PropertyCache(
+            self.cache.maxsize, self.cache.ttl
+        )
+        self.history_cache: PropertyCache[list[dict]] = PropertyCache(
+            self.cache.maxsize, self.cache.ttl
+        )
+        # Blocking wrappers share one event loop, so the fetchers' async
+        # connection pools survive between calls instead of leaking.
+        self._runner: asyncio.Runner | None = None
+
+    @classmethod
+    def from_plugins(cls, db_path: str, **kwargs) -> Self:
+        """Build a service from every installed `houses.sites` plugin."""
+        service = cls([], [], [], [], **kwargs)
+        for site, fetcher, parser, store in load_site_plugins(db_path):
+            service.register(site=site, fetcher=fetcher, parser=parser, store=store)
+        return service
+
+    def register(
+        self,
+        *,
+        site: PropertySite | None = None,
+        fetcher: PropertyFetcher | None = None,
+        parser: PropertyParser | None = None,
+        store: PropertyStore | None = None,
+    ) -> None:
+        if site is not None:
+            self.sites.append(site)
+            self._sites_by_name.setdefault(site.name(), site)
+        if fetcher is not None:
+            self.fetchers.register(fetcher)
+        if parser is not None:
+            self.parsers.register(parser)
+        if store is not None:
+            self.stores.register(store)
 
     def get_property(self, site_name: str, property_id: str) -> Property:
         data = self.get_property_from_store(site_name, property_id)
@@ -35,49 +99,392 @@ class HouseService:
     ) -> Property | None:
         site = self.get_site(site_name)
         url = site.get_property_url(property_id)
-        store = self.get_store(url)
-        return store.get(url)
+        return self._get_stored(url)
+
+    def _get_stored(self, url: str) -> Property | None:
+        property = self.cache.get(url)
+        if property is not None:
+            metrics.count("property_cache.hit")
+            return property
+        metrics.count("property_cache.miss")
+        with metrics.time("store.get"):
+            property = self.get_store(url).get(url)
+        if property is not None:
+            self.cache.put(url, property)
+        return property
+
+    async def get_property_async(self, site_name: str, property_id: str) -> Property:
+        url = self.get_site(site_name).get_property_url(property_id)
+        return await self.get_property_at_async(url)
+
+    async def get_property_at_async(self, url: str) -> Property:
+        property = self._get_stored(url)
+        if property is not None:
+            return property
+        return await self.fetch_property_at_async(url)
+
+    async def fetch_property_at_async(self, url: str) -> Property:
+        """Scrape `url` afresh, ignoring anything already stored."""
+        content = await self._fetch_async(self.get_fetcher(url), url)
+        return await self._parse_async(self.get_parser(url), content)
+
+    async def _fetch_async(self, fetcher: PropertyFetcher, url: str) -> str | bytes:
+        with metrics.track("fetch"), metrics.time("fetch"):
+            content = await fetcher.fetch_async(url)
+        # Streamed and cached pages are bytes; the rest count characters.
+        metrics.count("fetch.bytes", len(content))
+        return content
+
+    async def _parse_async(
+        self, parser: PropertyParser, content: str | bytes
+    ) -> Property:
+        """Parse off the event loop so callers such as the TUI keep drawing."""
+        with metrics.time("parse"):
+            if self.parse_pool is not None:
+                return await self.parse_pool.parse(parser, content)
+            return await asyncio.to_thread(parser.parse, content)
 
     def add_property(self, site_name: str, property_id: str, status: str) -> Property:
-        # [TODO] enable save from property object. store url on property object
+        url = self.get_site(site_name).get_property_url(property_id)
         property = self.get_property_from_url(site_name, property_id)
+        property.status = status
+        self.save_property(url, property, status)
+        return property
+
+    def add_properties(
+        self,
+        site_name: str,
+        property_ids: Sequence[str],
+        status: str,
+        *,
+        max_concurrent: int = 8,
+        batch_size: int = 50,
+        progress: ProgressCallback | None = None,
+    ) -> dict[str, Property | Exception]:
+        if self._runner is None:
+            self._runner = asyncio.Runner()
+        return self._runner.run(
+            self.add_properties_async(
+                site_name,
+                property_ids,
+                status,
+                max_concurrent=max_concurrent,
+                batch_size=batch_size,
+                progress=progress,
+            )
+        )
+
+    async def add_properties_async(
+        self,
+        site_name: str,
+        property_ids: Sequence[str],
+        status: str,
+        *,
+        max_concurrent: int = 8,
+        batch_size: int = 50,
+        progress: ProgressCallback | None = None,
+    ) -> dict[str, Property | Exception]:
+        """Fetch, parse and save many properties concurrently.
+
+        At most `max_concurrent` pages are downloaded at once. Parsed properties
+        are written to their store every `batch_size` results. `progress` is
+        called once per ID with the parsed property or the error that stopped it.
+        Pages are parsed in `parse_executor` when the service was given one,
+        otherwise in a worker thread.
+        """
+        site = self.get_site(site_name)
+        ids = {site.get_property_url(id): id for id in property_ids}
+
+        def report(url: str, result: Property | Exception) -> None:
+            if progress is not None:
+                progress(ids[url], result)
+
+        results = await self.add_urls_async(
+            ids,
+            status,
+            max_concurrent=max_concurrent,
+            batch_size=batch_size,
+            progress=report,
+        )
+        return {ids[url]: result for url, result in results.items()}
+
+    async def add_urls_async(
+        self,
+        urls: Iterable[str],
+        status: str,
+        *,
+        max_concurrent: int = 8,
+        batch_size: int = 50,
+        progress: ProgressCallback | None = None,
+        saved: Callable[[list[str]], None] | None = None,
+    ) -> dict[str, Property | Exception]:
+        """`add_properties_async` for listing URLs, from any registered site.
+
+        `saved` is called with the urls of each batch once it is written.
+        """
+
+        def save(batch: list[tuple[str, Property]]) -> list[str]:
+            for _, property in batch:
+                property.status = status
+            return self.save_properties(batch, status)
+
+        return await self._scrape_urls_async(
+            urls, save, max_concurrent, batch_size, progress, saved
+        )
+
+    async def refresh_urls_async(
+        self,
+        urls: Iterable[str],
+        *,
+        max_concurrent: int = 8,
+        batch_size: int = 50,
+        progress: ProgressCallback | None = None,
+        saved: Callable[[list[str]], None] | None = None,
+    ) -> dict[str, Property | Exception]:
+        """Re-scrape stored listings; see `refresh_properties`.
+
+        `saved` is called with the urls of each batch that were written, which
+        leaves out listings deleted while their pages downloaded.
+        """
+        return await self._scrape_urls_async(
+            urls, self.refresh_properties, max_concurrent, batch_size, progress, saved
+        )
+
+    async def _scrape_urls_async(
+        self,
+        urls: Iterable[str],
+        save: Callable[[list[tuple[str, Property]]], list[str]],
+        max_concurrent: int,
+        batch_size: int,
+        progress: ProgressCallback | None,
+        saved: Callable[[list[str]], None] | None,
+    ) -> dict[str, Property | Exception]:
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def fetch_and_parse(url: str) -> tuple[str, Property | Exception]:
+            try:
+                fetcher = self.get_fetcher(url)
+                parser = self.get_parser(url)
+                async with semaphore:
+                    content = await self._fetch_async(fetcher, url)
+                return url, await self._parse_async(parser, content)
+            except Exception as error:
+                return url, error
+
+        results: dict[str, Property | Exception] = {}
+        batch: list[tuple[str, Property]] = []
+        tasks = [fetch_and_parse(url) for url in dict.fromkeys(urls)]
+        for task in asyncio.as_completed(tasks):
+            url, result = await task
+            results[url] = result
+            if not isinstance(result, Exception):
+                batch.append((url, result))
+                if len(batch) >= batch_size:
+                    # Indexing a batch takes tens of milliseconds, too long to
+                    # block the event loop for.
+                    written = await asyncio.to_thread(save, batch)
+                    if saved is not None:
+                        saved(written)
+                    batch = []
+            if progress is not None:
+                progress(url, result)
+        if batch:
+            written = await asyncio.to_thread(save, batch)
+            if saved is not None:
+                saved(written)
+        return results
+
+    def list_properties(
+        self,
+        status: str,
+        after: tuple[str, str] | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        with metrics.time("store.list"):
+            rows = [
+                row
+                for store in self.stores
+                for row in store.list_by_status(status, after, limit)
+            ]
+        if len(self.stores) > 1:
+            rows.sort(key=lambda row: (row["display_address"], row["url"]))
+        return rows if limit is None else rows[:limit]
+
+    def subscribe(self, listener: ChangeListener) -> Callable[[], None]:
+        unsubscribers = [store.subscribe(listener) for store in self.stores]
+
+        def unsubscribe() -> None:
+            for unsubscriber in unsubscribers:
+                unsubscriber()
+
+        return unsubscribe
+
+    def poll_changes(self) -> bool:
+        """Return True if any store was written to by another process."""
+        changed = any([store.poll_external_changes() for store in self.stores])
+        if changed:
+            for cache in self._caches():
+                cache.clear()
+        return changed
+
+    def _caches(self) -> tuple[PropertyCache, ...]:
+        return (self.cache, self.image_url_cache, self.history_cache)
+
+    def _invalidate(self, url: str) -> None:
+        for cache in self._caches():
+            cache.invalidate(url)
+
+    def get_image_urls(self, url: str) -> list[str]:
+        """The listing's image URLs. The list is cached, so don't modify it."""
+        image_urls = self.image_url_cache.get(url)
+        if image_urls is None:
+            image_urls = self.get_store(url).get_image_urls(url)
+            self.image_url_cache.put(url, image_urls)
+        return image_urls
+
+    def search(
+        self,
+        text: str | None = None,
+        *,
+        bounds: tuple[float, float, float, float] | None = None,
+        status: str | None = None,
+        limit: int | None = 100,
+    ) -> list[dict]:
+        """Search every store's indexes; see `RightMoveStore.search`."""
+        with metrics.time("store.search"):
+            rows = [
+                row
+                for store in self.stores
+                for row in store.search(text, bounds=bounds, status=status, limit=limit)
+            ]
+        return rows if limit is None else rows[:limit]
+
+    def list_stale(self, before: float, limit: int | None = None) -> list[dict]:
+        rows = [row for store in self.stores for row in store.list_stale(before, limit)]
+        if len(self.stores) > 1:
+            rows.sort(
+                key=lambda row: (row["checked_at"] is not None, row["checked_at"])
+            )
+        return rows if limit is None else rows[:limit]
+
+    def mark_checked(self, urls: Iterable[str]) -> None:
+        by_store: dict[PropertyStore, list[str]] = {}
+        for url in urls:
+            by_store.setdefault(self.get_store(url), []).append(url)
+        for store, store_urls in by_store.items():
+            store.mark_checked(store_urls)
+
+    def get_history(self, url: str) -> list[dict]:
+        """The listing's price history. The list is cached, so don't modify it."""
+        history = self.history_cache.get(url)
+        if history is None:
+            history = self.get_store(url).get_history(url)
+            self.history_cache.put(url, history)
+        return history
+
+    def iter_rows(
+        self,
+        status: str | None = None,
+        *,
+        with_data: bool = False,
+        batch_size: int = 500,
+    ) -> Iterator[dict]:
+        """Stream every store's rows, one store after another."""
+        for store in self.stores:
+            yield from store.iter_rows(
+                status, with_data=with_data, batch_size=batch_size
+            )
 
     def save_property(self, url: str, property: Property, status: str) -> str:
         store = self.get_store(url)
+        self._invalidate(url)
         return store.set(url, property, status)
 
+    def save_properties(
+        self, properties: Sequence[tuple[str, Property]], status: str
+    ) -> list[str]:
+        return self._write_by_store(
+            properties, lambda store, items: store.set_many(items, status)
+        )
+
+    def refresh_properties(
+        self, properties: Sequence[tuple[str, Property]]
+    ) -> list[str]:
+        """Save re-scraped properties under whatever status each has now.
+
+        Listings deleted since they were read are skipped. Returns the urls
+        that were written.
+        """
+        return self._write_by_store(
+            properties, lambda store, items: store.refresh_many(items)
+        )
+
+    def _write_by_store(
+        self,
+        properties: Sequence[tuple[str, Property]],
+        write: Callable[[PropertyStore, list[tuple[str, Property]]], list[str]],
+    ) -> list[str]:
+        by_store: dict[PropertyStore, list[tuple[str, Property]]] = {}
+        for url, property in properties:
+            by_store.setdefault(self.get_store(url), []).append((url, property))
+        saved: list[str] = []
+        with metrics.time("store.save"):
+            for store, items in by_store.items():
+                saved.extend(write(store, items))
+        # Dropped after writing, since these run in worker threads: a reader
+        # could otherwise cache the old rows again before the commit.
+        for url, _ in properties:
+            self._invalidate(url)
+        metrics.count("store.rows_saved", len(saved))
+        return saved
+
+    def update_property(self, url: str, **kwargs) -> str:
+        self._invalidate(url)
+        return self.get_store(url).update(url, **kwargs)
+
+    def delete_property(self, url: str) -> str:
+        self._invalidate(url)
+        return self.get_store(url).delete(url)
+
     def get_property_from_url(self, site_name: str, property_id: str) -> Property:
         site = self.get_site(site_name)
         url = site.get_property_url(property_id)
         fetcher = self.get_fetcher(url)
         parser = self.get_parser(url)
-        content = fetcher.fetch(url)
-        property = parser.parse(content)
+        with metrics.track("fetch"), metrics.time("fetch"):
+            content = fetcher.fetch(url)
+        metrics.count("fetch.bytes", len(content))
+        with metrics.time("parse"):
+            property = parser.parse(content)
         return property
 
+    def close(self) -> None:
+        if self._runner is not None:
+            self._runner.run(self.aclose())
+            self._runner.close()
+            self._runner = None
+            return
+        for fetcher in self.fetchers:
+            fetcher.close()
+
+    async def aclose(self) -> None:
+        for fetcher in self.fetchers:
+            await fetcher.aclose()
+
     def get_site(self, site_name: str) -> PropertySite:
-        for site in self.sites:
-            if site.name() == site_name:
-                return site
-        raise ValueError(f"No site available for: {site_name}")
+        site = self._sites_by_name.get(site_name)
+        if site is None:
+            raise ValueError(f"No site available for: {site_name}")
+        return site
 
     def get_fetcher(self, url: str) -> PropertyFetcher:
-        for fetcher in self.fetchers:
-            if fetcher.supports_url(url):
-                return fetcher
-        raise ValueError(f"No fetcher available for url: {url}")
+        return self.fetchers.for_url(url)
 
     def get_parser(self, url: str) -> PropertyParser:
-        for parser in self.parsers:
-            if parser.supports_url(url):
-                return parser
-        raise ValueError(f"No parser available for url: {url}")
+        return self.parsers.for_url(url)
 
     def get_store(self, url: str) -> PropertyStore:
-        for store in self.stores:
-            if store.supports_url(url):
-                return store
-        raise ValueError(f"No store available for url: {url}")
+        return self.stores.for_url(url)
 
 
 if __name__ == "__main__":
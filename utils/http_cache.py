@@ -0,0 +1,153 @@
+"""On-disk HTTP response cache with ETag / Last-Modified revalidation.
+
+Every response is kept, so pages can be re-parsed offline. Only those that
+came with validators are revalidated.
+
+Bodies are stored once per SHA-256 under `objects/`, and a small SQLite index
+maps each URL to its body and validators. Once the total body size passes
+`max_bytes`, the least recently used entries are evicted.
+"""
+
+import hashlib
+import sqlite3
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import NamedTuple
+
+__all__ = ["CachedResponse", "ResponseCache"]
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    encoding: str | None
+    etag: str | None
+    last_modified: str | None
+
+
+class ResponseCache:
+    def __init__(self, directory: str | Path, max_bytes: int = 500 * 1024**2) -> None:
+        self.directory = Path(directory)
+        self.objects = self.directory / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(self.directory / "index.db")
+        self.conn.executescript(
+            """
+            create table if not exists responses (
+                url text primary key,
+                digest text not null,
+                size integer not null,
+                encoding text,
+                etag text,
+                last_modified text,
+                accessed real not null
+            );
+            create index if not exists responses_accessed on responses (accessed);
+            create index if not exists responses_digest on responses (digest);
+            """
+        )
+
+    def _path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def get(self, url: str) -> CachedResponse | None:
+        row = self.conn.execute(
+            "select digest, encoding, etag, last_modified from responses where url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        digest, encoding, etag, last_modified = row
+        try:
+            body = self._path(digest).read_bytes()
+        except FileNotFoundError:
+            self._forget(url)
+            return None
+        self.conn.execute(
+            "update responses set accessed = ? where url = ?", (time.time(), url)
+        )
+        self.conn.commit()
+        return CachedResponse(body, encoding, etag, last_modified)
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        row = self.conn.execute(
+            "select digest, etag, last_modified from responses where url = ?", (url,)
+        ).fetchone()
+        if row is None or not self._path(row[0]).exists():
+            return {}
+        headers = {}
+        if row[1]:
+            headers["If-None-Match"] = row[1]
+        if row[2]:
+            headers["If-Modified-Since"] = row[2]
+        return headers
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        headers: Mapping[str, str],
+        encoding: str | None = None,
+    ) -> None:
+        # Responses without validators are kept for offline re-parsing; they
+        # are just never revalidated.
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        digest = hashlib.sha256(body).hexdigest()
+        # The old entry goes first: forgetting it afterwards would delete the
+        # body file whenever the page is unchanged.
+        self._forget(url, commit=False)
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            partial = path.with_suffix(".tmp")
+            partial.write_bytes(body)
+            partial.replace(path)
+        self.conn.execute(
+            "insert into responses values (?, ?, ?, ?, ?, ?, ?)",
+            (url, digest, len(body), encoding, etag, last_modified, time.time()),
+        )
+        self.conn.commit()
+        self.evict()
+
+    def size(self) -> int:
+        row = self.conn.execute(
+            "select coalesce(sum(size), 0) from "
+            "(select distinct digest, size from responses)"
+        ).fetchone()
+        return row[0]
+
+    def evict(self) -> None:
+        total = self.size()
+        if total <= self.max_bytes:
+            return
+        cursor = self.conn.execute(
+            "select url, size from responses order by accessed"
+        ).fetchall()
+        for url, size in cursor:
+            if total <= self.max_bytes:
+                break
+            if self._forget(url, commit=False):
+                total -= size
+        self.conn.commit()
+
+    def _forget(self, url: str, commit: bool = True) -> bool:
+        """Drop `url` and return True if its body file was deleted with it."""
+        row = self.conn.execute(
+            "select digest from responses where url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return False
+        self.conn.execute("delete from responses where url = ?", (url,))
+        shared = self.conn.execute(
+            "select 1 from responses where digest = ? limit 1", (row[0],)
+        ).fetchone()
+        if not shared:
+            self._path(row[0]).unlink(missing_ok=True)
+        if commit:
+            self.conn.commit()
+        return not shared
+
+    def close(self) -> None:
+        self.conn.close()
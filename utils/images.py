@@ -0,0 +1,156 @@
+"""Async image prefetching with decoded-thumbnail memory and disk caches."""
+
+import asyncio
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Protocol
+
+import httpx
+from PIL import Image
+
+from .metrics import metrics
+
+__all__ = ["ImageService"]
+
+
+class AsyncClientSource(Protocol):
+    @property
+    def async_client(self) -> httpx.AsyncClient: ...
+
+
+class ImageService:
+    """Fetch gallery images through a shared client and keep small copies.
+
+    Thumbnails are decoded once, downscaled to `size` and kept in memory up to
+    `memory_budget` bytes of pixels. When `cache_dir` is set they are also
+    written to disk as JPEGs, up to `disk_budget` bytes. Both caches evict the
+    least recently used images first.
+    """
+
+    def __init__(
+        self,
+        source: AsyncClientSource,
+        cache_dir: str | Path | None = None,
+        *,
+        size: tuple[int, int] = (656, 437),
+        max_concurrent: int = 6,
+        memory_budget: int = 64 * 1024**2,
+        disk_budget: int = 256 * 1024**2,
+    ) -> None:
+        self.source = source
+        self.size = size
+        self.max_concurrent = max_concurrent
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._memory: OrderedDict[str, Image.Image] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._tasks: dict[str, asyncio.Task[Image.Image]] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(
+                entry.stat().st_size for entry in os.scandir(self.cache_dir)
+            )
+
+    async def get(self, url: str) -> Image.Image:
+        image = self._memory.get(url)
+        if image is not None:
+            metrics.count("images.memory_hit")
+            self._memory.move_to_end(url)
+            return image
+        return await asyncio.shield(self._schedule(url))
+
+    def prefetch(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            if url not in self._memory:
+                self._schedule(url)
+
+    def _schedule(self, url: str) -> asyncio.Task[Image.Image]:
+        task = self._tasks.get(url)
+        if task is None:
+            task = asyncio.create_task(self._load(url))
+            self._tasks[url] = task
+            task.add_done_callback(lambda task: self._forget(url, task))
+        return task
+
+    def _forget(self, url: str, task: asyncio.Task[Image.Image]) -> None:
+        self._tasks.pop(url, None)
+        # Prefetches are never awaited, so a failed download is dropped here
+        # and retried the next time the image is asked for.
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, url: str) -> Image.Image:
+        image = await asyncio.to_thread(self._read_disk, url)
+        if image is not None:
+            metrics.count("images.disk_hit")
+        else:
+            metrics.count("images.download")
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            async with self._semaphore:
+                with metrics.track("images"), metrics.time("images.fetch"):
+                    response = await self.source.async_client.get(url)
+            response.raise_for_status()
+            metrics.count("images.bytes", len(response.content))
+            with metrics.time("images.decode"):
+                image = await asyncio.to_thread(self._decode, response.content)
+            await asyncio.to_thread(self._write_disk, url, image)
+        self._remember(url, image)
+        return image
+
+    def _decode(self, content: bytes) -> Image.Image:
+        image = Image.open(io.BytesIO(content))
+        image.draft("RGB", self.size)
+        image = image.convert("RGB")
+        image.thumbnail(self.size)
+        image.load()
+        return image
+
+    def _remember(self, url: str, image: Image.Image) -> None:
+        if url in self._memory:
+            return
+        self._memory[url] = image
+        self._memory_bytes += _pixel_bytes(image)
+        while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= _pixel_bytes(evicted)
+
+    def _disk_path(self, url: str) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.jpg"
+
+    def _read_disk(self, url: str) -> Image.Image | None:
+        path = self._disk_path(url)
+        if path is None or not path.exists():
+            return None
+        os.utime(path)
+        image = Image.open(path)
+        image.load()
+        return image
+
+    def _write_disk(self, url: str, image: Image.Image) -> None:
+        path = self._disk_path(url)
+        if path is None or self.cache_dir is None:
+            return
+        image.save(path, "JPEG", quality=85)
+        self._disk_bytes += path.stat().st_size
+        if self._disk_bytes <= self.disk_budget:
+            return
+        entries = sorted(os.scandir(self.cache_dir), key=lambda e: e.stat().st_mtime)
+        for entry in entries:
+            if self._disk_bytes <= self.disk_budget:
+                break
+            self._disk_bytes -= entry.stat().st_size
+            os.unlink(entry.path)
+
+
+def _pixel_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
@@ -0,0 +1,152 @@
+"""Opt-in timings and counters for the fetch, parse and store hot paths.
+
+Components record into the shared `metrics` instance. While it is disabled,
+`time` and `track` hand back one shared no-op context manager and `count`
+returns straight away, so instrumented code pays an attribute check and a call.
+"""
+
+import bisect
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from pathlib import Path
+
+__all__ = ["Histogram", "Metrics", "metrics"]
+
+_DISABLED = nullcontext()
+
+
+class Histogram:
+    """Latencies in log2 buckets from 50 µs up to about 55 s."""
+
+    BOUNDS = tuple(50e-6 * 2**i for i in range(21))
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """The upper bound of the bucket holding the `q` quantile."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "mean_ms": mean * 1e3,
+            "p50_ms": self.quantile(0.5) * 1e3,
+            "p95_ms": self.quantile(0.95) * 1e3,
+            "max_ms": self.max * 1e3,
+            "buckets": dict(
+                zip(
+                    [f"<={bound * 1e3:g}ms" for bound in self.BOUNDS] + ["inf"],
+                    self.buckets,
+                )
+            ),
+        }
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+        self.in_flight: dict[str, int] = {}
+        self.started = time.time()
+        # Parsing runs in worker threads, and `+=` is not atomic.
+        self._lock = threading.Lock()
+
+    def time(self, stage: str) -> AbstractContextManager[None]:
+        """Record how long the block takes under `stage`."""
+        if not self.enabled:
+            return _DISABLED
+        return self._time(stage)
+
+    @contextmanager
+    def _time(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.record(seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def track(self, name: str) -> AbstractContextManager[None]:
+        """Count the block as in flight under `name` while it runs."""
+        if not self.enabled:
+            return _DISABLED
+        return self._track(name)
+
+    @contextmanager
+    def _track(self, name: str) -> Iterator[None]:
+        with self._lock:
+            self.in_flight[name] = self.in_flight.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight[name] -= 1
+
+    def ratio(self, hits: str, misses: str) -> float | None:
+        total = self.counters.get(hits, 0) + self.counters.get(misses, 0)
+        return self.counters.get(hits, 0) / total if total else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "started": self.started,
+                "uptime_s": time.time() - self.started,
+                "stages": {
+                    stage: histogram.snapshot()
+                    for stage, histogram in sorted(self.histograms.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "in_flight": dict(sorted(self.in_flight.items())),
+            }
+
+    def dump(self, path: str | Path) -> Path:
+        """Write `snapshot()` to `path` as JSON."""
+        path = Path(path)
+        path.write_text(json.dumps(self.snapshot(), indent=2))
+        return path
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+
+metrics = Metrics()
@@ -0,0 +1,95 @@
+"""Versioned schema migrations, tracked in SQLite's `user_version`.
+
+Each migration gets the position an interrupted run reached, or None, and may
+return an iterator that yields `(position, rows)` after every batch it writes.
+By default all pending migrations run in one transaction. With a `checkpoint`,
+work is committed every `checkpoint` rows together with its position, and the
+next run carries on from there.
+"""
+
+import sqlite3
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+
+__all__ = ["Migration", "MigrationProgress", "migrate", "schema_version"]
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[str | None], Iterable[tuple[str, int]] | None]
+
+
+MigrationProgress = Callable[[Migration, int], None]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("pragma user_version").fetchone()[0]
+
+
+def migrate(
+    conn: sqlite3.Connection,
+    migrations: Iterable[Migration],
+    *,
+    checkpoint: int | None = None,
+    progress: MigrationProgress | None = None,
+) -> list[Migration]:
+    """Apply every migration newer than the database, in version order.
+
+    `progress` is called after each batch with the rows done so far in this
+    run. Returns the migrations applied.
+    """
+    current = schema_version(conn)
+    pending = sorted(
+        (migration for migration in migrations if migration.version > current),
+        key=lambda migration: migration.version,
+    )
+    if not pending:
+        return []
+    if conn.in_transaction:
+        raise ValueError("Commit or roll back before migrating")
+    # Taking the write lock up front stops another connection from writing to
+    # a half-migrated schema.
+    conn.execute("begin immediate")
+    try:
+        conn.execute(
+            """
+            create table if not exists schema_migration_progress (
+                version integer primary key,
+                position text not null
+            )
+            """
+        )
+        for migration in pending:
+            row = conn.execute(
+                "select position from schema_migration_progress where version = ?",
+                (migration.version,),
+            ).fetchone()
+            done = uncommitted = 0
+            for position, rows in migration.apply(row and row[0]) or ():
+                done += rows
+                uncommitted += rows
+                if progress is not None:
+                    progress(migration, done)
+                if checkpoint is not None and uncommitted >= checkpoint:
+                    conn.execute(
+                        "insert or replace into schema_migration_progress "
+                        "values (?, ?)",
+                        (migration.version, position),
+                    )
+                    conn.commit()
+                    conn.execute("begin immediate")
+                    uncommitted = 0
+            conn.execute(
+                "delete from schema_migration_progress where version = ?",
+                (migration.version,),
+            )
+            conn.execute(f"pragma user_version = {int(migration.version)}")
+            if checkpoint is not None:
+                conn.commit()
+                conn.execute("begin immediate")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return pending
@@ -0,0 +1,180 @@
+"""Linear-time extraction of `window.<name> = {...}` models from page source."""
+
+import re
+from collections.abc import Collection
+
+import orjson
+
+__all__ = ["ModelStream", "find_model", "find_models", "load_model", "load_models"]
+
+# JSON strings are matched whole so braces inside them are never counted.
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_TOKENS = re.compile(rf"({_STRING})|(\{{)|(\}})", re.DOTALL)
+_TOKENS_BYTES = re.compile(rf"({_STRING})|(\{{)|(\}})".encode(), re.DOTALL)
+_OPEN, _CLOSE = 2, 3
+# A lone quote only matches when its string has not been fully received yet.
+_STREAM_TOKENS = re.compile(rf"({_STRING})|(\{{)|(\}})|(\")".encode(), re.DOTALL)
+_INCOMPLETE = 4
+_ASSIGNMENT = re.compile(r"window\.(\w+)\s*=\s*\{")
+_ASSIGNMENT_BYTES = re.compile(rb"window\.(\w+)\s*=\s*\{")
+
+
+def find_model(content: str | bytes, name: str = "PAGE_MODEL") -> tuple[int, int]:
+    """Return the `(start, end)` span of the object assigned to `window.<name>`."""
+    if isinstance(content, str):
+        marker, assign, tokens = f"window.{name}", "=", _TOKENS
+    else:
+        marker, assign, tokens = f"window.{name}".encode(), b"=", _TOKENS_BYTES
+    position = content.find(marker)
+    while position != -1:
+        after = position + len(marker)
+        match = tokens.search(content, after)
+        if match and match.lastindex == _OPEN:
+            if content[after : match.start()].strip() == assign:
+                return match.start(), _match_brace(content, match.start(), tokens)
+        position = content.find(marker, after)
+    raise ValueError(f"Couldn't locate {name} model.")
+
+
+def _match_brace(content: str | bytes, start: int, tokens: re.Pattern) -> int:
+    depth = 0
+    for match in tokens.finditer(content, start):
+        if match.lastindex == _OPEN:
+            depth += 1
+        elif match.lastindex == _CLOSE:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise ValueError("Model object is not terminated.")
+
+
+def find_models(
+    content: str | bytes, names: Collection[str] | None = None
+) -> dict[str, tuple[int, int]]:
+    """Return the spans of every `window.<name> = {...}` object in one pass.
+
+    Scanning resumes after each object, so the page is read once however many
+    models it holds. Pass `names` to keep only those models. The first
+    assignment of a name wins.
+    """
+    if isinstance(content, str):
+        assignment, tokens = _ASSIGNMENT, _TOKENS
+    else:
+        assignment, tokens = _ASSIGNMENT_BYTES, _TOKENS_BYTES
+    spans: dict[str, tuple[int, int]] = {}
+    match = assignment.search(content)
+    while match is not None:
+        name = match.group(1)
+        if isinstance(name, bytes):
+            name = name.decode()
+        start = match.end() - 1
+        try:
+            end = _match_brace(content, start, tokens)
+        except ValueError:
+            break
+        if (names is None or name in names) and name not in spans:
+            spans[name] = (start, end)
+            if names is not None and len(spans) == len(names):
+                break
+        match = assignment.search(content, end)
+    return spans
+
+
+def load_model(content: str | bytes, name: str = "PAGE_MODEL") -> dict:
+    """Decode `window.<name>`, passing bytes to orjson without copying."""
+    start, end = find_model(content, name)
+    if isinstance(content, str):
+        return orjson.loads(content[start:end])
+    return orjson.loads(memoryview(content)[start:end])
+
+
+def load_models(
+    content: str | bytes, names: Collection[str] | None = None
+) -> dict[str, dict]:
+    """Decode the models found by `find_models`, skipping any that aren't JSON."""
+    view = content if isinstance(content, str) else memoryview(content)
+    models = {}
+    for name, (start, end) in find_models(content, names).items():
+        try:
+            models[name] = orjson.loads(view[start:end])
+        except orjson.JSONDecodeError:
+            continue
+    return models
+
+
+class ModelStream:
+    """Incremental `find_model` over a stream of byte chunks.
+
+    Only a marker-sized tail is kept until `window.<name>` shows up. After
+    that, the buffer holds just the model. `feed` returns True once the
+    closing brace has arrived, so the caller can stop reading the response.
+    """
+
+    def __init__(self, name: str = "PAGE_MODEL") -> None:
+        self.name = name
+        self.marker = f"window.{name}".encode()
+        self.bytes_read = 0
+        self._buffer = bytearray()
+        self._scan = 0
+        self._depth = 0
+        self._started = False
+        self._end: int | None = None
+
+    @property
+    def done(self) -> bool:
+        return self._end is not None
+
+    @property
+    def model(self) -> bytes:
+        """The `window.<name> = {...}` source, ready for `find_model`."""
+        if self._end is None:
+            raise ValueError(f"Couldn't locate {self.name} model.")
+        return bytes(self._buffer[: self._end])
+
+    def feed(self, chunk: bytes) -> bool:
+        if self._end is not None:
+            return True
+        self.bytes_read += len(chunk)
+        self._buffer += chunk
+        if not self._started and not self._find_start():
+            return False
+        return self._find_end()
+
+    def _find_start(self) -> bool:
+        buffer = self._buffer
+        while True:
+            position = buffer.find(self.marker, self._scan)
+            if position == -1:
+                del buffer[: max(0, len(buffer) - len(self.marker) + 1)]
+                self._scan = 0
+                return False
+            after = position + len(self.marker)
+            match = _STREAM_TOKENS.search(buffer, after)
+            if match is None or match.lastindex == _INCOMPLETE:
+                del buffer[:position]
+                self._scan = 0
+                return False
+            if (
+                match.lastindex == _OPEN
+                and buffer[after : match.start()].strip() == b"="
+            ):
+                self._scan = match.start() - position
+                del buffer[:position]
+                self._started = True
+                return True
+            self._scan = after
+
+    def _find_end(self) -> bool:
+        for match in _STREAM_TOKENS.finditer(self._buffer, self._scan):
+            if match.lastindex == _INCOMPLETE:
+                self._scan = match.start()
+                return False
+            if match.lastindex == _OPEN:
+                self._depth += 1
+            elif match.lastindex == _CLOSE:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = match.end()
+                    return True
+        self._scan = len(self._buffer)
+        return False
@@ -0,0 +1,80 @@
+import asyncio
+from collections.abc import Sequence
+from concurrent.futures import Executor
+
+from protocols import Property, PropertyParser
+
+__all__ = ["ParsePool", "parse_chunk"]
+
+
+def parse_chunk(
+    parser: PropertyParser, contents: Sequence[str | bytes]
+) -> list[Property | Exception]:
+    results: list[Property | Exception] = []
+    for content in contents:
+        try:
+            results.append(parser.parse(content))
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+class ParsePool:
+    """Parse pages in an executor, sending them in chunks.
+
+    Pages are queued per parser and submitted once `chunk_size` are waiting or
+    `max_delay` seconds after the first one arrived, whichever comes first.
+    """
+
+    def __init__(
+        self, executor: Executor, chunk_size: int = 8, max_delay: float = 0.05
+    ) -> None:
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.max_delay = max_delay
+        self._pending: dict[
+            PropertyParser, list[tuple[str | bytes, asyncio.Future[Property]]]
+        ] = {}
+        self._timers: dict[PropertyParser, asyncio.TimerHandle] = {}
+
+    async def parse(self, parser: PropertyParser, content: str | bytes) -> Property:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Property] = loop.create_future()
+        pending = self._pending.setdefault(parser, [])
+        pending.append((content, future))
+        if len(pending) >= self.chunk_size:
+            self.flush(parser)
+        elif parser not in self._timers:
+            self._timers[parser] = loop.call_later(self.max_delay, self.flush, parser)
+        return await future
+
+    def flush(self, parser: PropertyParser) -> None:
+        timer = self._timers.pop(parser, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(parser, [])
+        if not pending:
+            return
+        contents = [content for content, _ in pending]
+        job = asyncio.wrap_future(self.executor.submit(parse_chunk, parser, contents))
+        job.add_done_callback(lambda job: self._resolve(job, pending))
+
+    @staticmethod
+    def _resolve(
+        job: asyncio.Future[list[Property | Exception]],
+        pending: list[tuple[str | bytes, asyncio.Future[Property]]],
+    ) -> None:
+        futures = [future for _, future in pending]
+        if job.cancelled():
+            for future in futures:
+                future.cancel()
+            return
+        error = job.exception()
+        results = [error] * len(futures) if error else job.result()
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
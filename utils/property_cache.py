@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+
+from protocols import Property
+
+__all__ = ["PropertyCache"]
+
+
+class PropertyCache[T = Property]:
+    """Size-bounded LRU of properties keyed by URL, with an optional TTL.
+
+    It can hold other per-listing values too, such as image URL lists. Writes
+    made in worker threads invalidate entries, so access is locked.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, url: str) -> T | None:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and self.ttl is not None:
+                if time.monotonic() - entry[0] > self.ttl:
+                    del self._entries[url]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(url)
+            return entry[1]
+
+    def put(self, url: str, value: T) -> None:
+        with self._lock:
+            self._entries[url] = (time.monotonic(), value)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: str) -> None:
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from protocols import Property, PropertyService
+
+from .house_service import ProgressCallback
+
+__all__ = ["RefreshScheduler"]
+
+
+class RefreshScheduler:
+    """Re-scrape stored properties that haven't been checked for `max_age` seconds.
+
+    At most `rate` requests are started per second. Refreshed properties keep
+    the status they have when the new page is saved, and listings deleted
+    meanwhile stay deleted. The store only adds a history row when the price or listing
+    status has changed since the last scrape.
+    """
+
+    def __init__(
+        self,
+        service: PropertyService,
+        *,
+        max_age: float = 24 * 60 * 60,
+        rate: float = 0.5,
+        max_concurrent: int = 4,
+        batch_size: int = 50,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f"Refresh rate must be positive: {rate}")
+        self.service = service
+        self.max_age = max_age
+        self.rate = rate
+        self.max_concurrent = max_concurrent
+        self.batch_size = batch_size
+        self._next_start = 0.0
+
+    async def run(self, idle: float = 5 * 60) -> None:
+        """Refresh forever, sleeping `idle` seconds whenever nothing is stale."""
+        while True:
+            if not await self.refresh_once():
+                await asyncio.sleep(idle)
+
+    async def refresh_once(
+        self, progress: ProgressCallback | None = None
+    ) -> dict[str, Property | Exception]:
+        """Refresh up to `batch_size` of the stalest properties."""
+        stale = self.service.list_stale(time.time() - self.max_age, self.batch_size)
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def refresh(url: str) -> tuple[str, Property | Exception]:
+            try:
+                async with semaphore:
+                    await self._throttle()
+                    return url, await self.service.fetch_property_at_async(url)
+            except Exception as error:
+                return url, error
+
+        results: dict[str, Property | Exception] = {}
+        for task in asyncio.as_completed([refresh(row["url"]) for row in stale]):
+            url, result = await task
+            results[url] = result
+            if progress is not None:
+                progress(url, result)
+
+        # Statuses are re-read at write time: listings may have been moved or
+        # deleted while their pages were downloading.
+        await asyncio.to_thread(
+            self.service.refresh_properties,
+            [
+                (url, result)
+                for url, result in results.items()
+                if not isinstance(result, Exception)
+            ],
+        )
+        failed = [
+            url for url, result in results.items() if isinstance(result, Exception)
+        ]
+        if failed:
+            await asyncio.to_thread(self.service.mark_checked, failed)
+        return results
+
+    async def _throttle(self) -> None:
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + 1 / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
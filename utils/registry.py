@@ -0,0 +1,81 @@
+"""Constant-time lookup of site components by site name and URL host.
+
+Other packages can add sites through the `houses.sites` entry point group.
+Each entry point names a callable that takes the database path and returns a
+`(site, fetcher, parser, store)` tuple.
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
+from importlib.metadata import entry_points
+from typing import Protocol
+from urllib.parse import urlparse
+
+from protocols import PropertyFetcher, PropertyParser, PropertySite, PropertyStore
+
+__all__ = ["ComponentRegistry", "SiteComponents", "load_site_plugins", "url_host"]
+
+ENTRY_POINT_GROUP = "houses.sites"
+
+SiteComponents = tuple[PropertySite, PropertyFetcher, PropertyParser, PropertyStore]
+
+
+@lru_cache(maxsize=4096)
+def url_host(url: str) -> str:
+    host = urlparse(url).hostname
+    if not host:
+        raise ValueError(f"Could not detect host in url: {url}")
+    return host
+
+
+class UrlComponent(Protocol):
+    def supports_url(self, url: str) -> bool: ...
+
+
+class ComponentRegistry[T: UrlComponent]:
+    """Components indexed by the hosts they declare in `valid_hosts`.
+
+    Components without `valid_hosts` are found by asking `supports_url` once
+    per host. The answer is then remembered, so later lookups are one dict hit.
+    """
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self._components: list[T] = []
+        self._by_host: dict[str, T | None] = {}
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._components)
+
+    def __len__(self) -> int:
+        return len(self._components)
+
+    def __getitem__(self, index: int) -> T:
+        return self._components[index]
+
+    def register(self, component: T) -> None:
+        self._components.append(component)
+        hosts: Iterable[str] = getattr(component, "valid_hosts", ())
+        for host in hosts:
+            self._by_host.setdefault(host.lower(), component)
+        # Forget negative answers that the new component might now satisfy.
+        self._by_host = {h: c for h, c in self._by_host.items() if c is not None}
+
+    def for_url(self, url: str) -> T:
+        host = url_host(url)
+        if host not in self._by_host:
+            self._by_host[host] = next(
+                (c for c in self._components if c.supports_url(url)), None
+            )
+        component = self._by_host[host]
+        if component is None:
+            raise ValueError(f"No {self.kind} available for url: {url}")
+        return component
+
+
+def load_site_plugins(db_path: str) -> list[SiteComponents]:
+    plugins: list[SiteComponents] = []
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        factory: Callable[[str], SiteComponents] = entry_point.load()
+        plugins.append(factory(db_path))
+    return plugins
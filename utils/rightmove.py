@@ -1,17 +1,27 @@
+import hashlib
+import re
 import sqlite3
-from urllib.parse import urlparse
+import threading
+import time
+from functools import partial
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from typing import ClassVar, Self
 
-import httpx
-import orjson
 import orjson as json
-import regex
-import requests
 
 from protocols import Property
 
+from .changes import ChangeFeed, ChangeKind, ChangeListener, PropertyChange
+from .codecs import PayloadCodec, get_codec, train_dictionary
+from .metrics import metrics
+from .migrations import Migration, MigrationProgress, schema_version
+from .migrations import migrate as migrate_schema
+from .page_model import find_model, load_models
+from .registry import SiteComponents, url_host
+
 __all__ = [
     "RightMove",
-    "RightMoveFetcher",
     "RightMoveParser",
     "RightMoveProperty",
     "RightMoveStore",
@@ -19,24 +29,164 @@ __all__ = [
 
 
 def check_url_host_in(url: str, valid: set[str]) -> bool:
-    host = urlparse(url).hostname
-    if not host:
-        raise ValueError(f"Could not detect host in url: {url}")
-    return host in valid
+    return url_host(url) in valid
+
+
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def search_text(data: dict) -> tuple[str, str, str]:
+    """The address, summary and key features indexed for full-text search."""
+    property_data = data.get("propertyData") or {}
+    address = property_data.get("address") or {}
+    text = property_data.get("text") or {}
+    parts = ("displayAddress", "outcode", "incode")
+    location = " ".join(address[part] for part in parts if address.get(part))
+    description = _TAGS.sub(" ", text.get("description") or "")
+    summary = f"{text.get('propertyPhrase') or ''} {description}".strip()
+    features = property_data.get("keyFeatures") or []
+    return location, summary, "\n".join(feature.strip() for feature in features)
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def summarise_page_model(data: dict) -> tuple:
+    """Pull the hot fields out of a PAGE_MODEL, in `RightMoveProperty` order."""
+    property_data = data.get("propertyData") or {}
+    id = property_data.get("id")
+    address = property_data.get("address") or {}
+    location = property_data.get("location") or {}
+    analytics = (data.get("analyticsInfo") or {}).get("analyticsProperty") or {}
+    price = analytics.get("price")
+    if isinstance(price, int | float):
+        price = int(price)
+    else:
+        prices = property_data.get("prices") or {}
+        digits = "".join(filter(str.isdigit, prices.get("primaryPrice") or ""))
+        price = int(digits) if digits else None
+    images = property_data.get("images") or []
+    if (property_data.get("status") or {}).get("archived"):
+        listing_status = "ARCHIVED"
+    else:
+        listing_status = ",".join(property_data.get("tags") or []) or None
+    return (
+        None if id is None else str(id),
+        address.get("displayAddress") or "",
+        price,
+        property_data.get("bedrooms"),
+        location.get("latitude"),
+        location.get("longitude"),
+        listing_status,
+        tuple(image["url"] for image in images if image.get("url")),
+    )
 
 
 class RightMoveProperty:
-    data: dict
+    """A listing's hot fields, with the full PAGE_MODEL kept as JSON bytes.
+
+    `data` decodes the JSON on every access. Properties read back from a store
+    may hold only a loader, and fetch their JSON the first time it is needed.
+    """
+
+    __slots__ = (
+        "property_id",
+        "display_address",
+        "price",
+        "bedrooms",
+        "latitude",
+        "longitude",
+        "listing_status",
+        "status",
+        "_image_urls",
+        "_search_text",
+        "_raw",
+        "_loader",
+    )
+    valid_hosts: ClassVar[set[str]] = {"rightmove.co.uk", "www.rightmove.co.uk"}
+
+    property_id: str | None
+    display_address: str
+    price: int | None
+    bedrooms: int | None
+    latitude: float | None
+    longitude: float | None
+    listing_status: str | None
     status: str | None
-    valid_hosts: set[str] = {"rightmove.co.uk", "www.rightmove.co.uk"}
 
     def __init__(self, data: dict, status: str | None = None) -> None:
-        self.data = data
+        self._set_fields(data)
+        self._raw: bytes | None = json.dumps(data)
+        self._loader: Callable[[], bytes] | None = None
         self.status = status
 
+    def _set_fields(self, data: dict) -> None:
+        (
+            self.property_id,
+            self.display_address,
+            self.price,
+            self.bedrooms,
+            self.latitude,
+            self.longitude,
+            self.listing_status,
+            self._image_urls,
+        ) = summarise_page_model(data)
+        # Worked out while the JSON is decoded so saving needn't decode it again.
+        self._search_text = search_text(data)
+
+    @classmethod
+    def from_json(cls, raw: bytes | memoryview, status: str | None = None) -> Self:
+        house = cls.__new__(cls)
+        house._set_fields(json.loads(raw))
+        house._raw = bytes(raw)
+        house._loader = None
+        house.status = status
+        return house
+
+    @classmethod
+    def from_summary(
+        cls, summary: Mapping, loader: Callable[[], bytes], status: str | None = None
+    ) -> Self:
+        house = cls.__new__(cls)
+        for field in RightMoveStore.HOT_COLUMNS:
+            setattr(house, field, summary[field])
+        house._image_urls = None
+        house._search_text = None
+        house._raw = None
+        house._loader = loader
+        house.status = status
+        return house
+
     def supports_url(self, url: str) -> bool:
         return check_url_host_in(url, self.valid_hosts)
 
+    @property
+    def raw(self) -> bytes:
+        if self._raw is None:
+            if self._loader is None:
+                raise ValueError("Property has no JSON payload")
+            self._raw, self._loader = self._loader(), None
+        return self._raw
+
+    @property
+    def data(self) -> dict:
+        return json.loads(self.raw)
+
+    @property
+    def image_urls(self) -> tuple[str, ...]:
+        if self._image_urls is None:
+            self._set_fields(self.data)
+        return self._image_urls
+
+    @property
+    def search_text(self) -> tuple[str, str, str]:
+        """The address, summary and key features indexed for full-text search."""
+        if self._search_text is None:
+            self._set_fields(self.data)
+        return self._search_text
+
 
 class RightMove:
     def name(self) -> str:
@@ -50,62 +200,210 @@ class RightMove:
         return RightMoveProperty
 
 
-class RightMoveFetcher:
-    HEADERS = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
-        "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
-        # 'Accept-Encoding': 'gzip, deflate, br',
-        "DNT": "1",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Sec-Fetch-Dest": "document",
-        "Sec-Fetch-Mode": "navigate",
-        "Sec-Fetch-Site": "none",
-        "Cache-Control": "max-age=0",
-    }
+class RightMoveParser:
     valid_hosts: set[str] = {"rightmove.co.uk", "www.rightmove.co.uk"}
 
     def supports_url(self, url: str) -> bool:
-        return check_url_host_in(url.lower(), self.valid_hosts)
+        return check_url_host_in(url, self.valid_hosts)
 
-    def fetch(self, url: str) -> str:
-        response = requests.get(url, headers=self.HEADERS)
-        response.raise_for_status()
-        return response.text
+    def parse(self, content: str | bytes) -> RightMoveProperty:
+        with metrics.time("parse.extract"):
+            start, end = find_model(content, "PAGE_MODEL")
+        with metrics.time("parse.decode"):
+            if isinstance(content, str):
+                return RightMoveProperty.from_json(content[start:end].encode())
+            return RightMoveProperty.from_json(memoryview(content)[start:end])
 
-    async def fetch_async(self, url: str) -> str:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.HEADERS)
-            return response.text
+    def parse_models(
+        self, content: str | bytes, names: Collection[str] | None = None
+    ) -> dict[str, dict]:
+        """Decode every window model on the page, e.g. PAGE_MODEL and adInfo."""
+        return load_models(content, names)
 
 
-class RightMoveParser:
-    _valid_hosts: set[str] = {"rightmove.co.uk", "www.rightmove.co.uk"}
+class RightMoveStore:
+    _constructor: type[RightMoveProperty] = RightMoveProperty
+    valid_hosts: set[str] = {"rightmove.co.uk", "www.rightmove.co.uk"}
+    # Fields copied out of the JSON blob at write time so list views never
+    # have to parse it.
+    HOT_COLUMNS: dict[str, str] = {
+        "property_id": "text",
+        "display_address": "text",
+        "price": "integer",
+        "bedrooms": "integer",
+        "latitude": "real",
+        "longitude": "real",
+        "listing_status": "text",
+    }
+    # How `data` is encoded: a null codec means plain orjson bytes.
+    PAYLOAD_COLUMNS: dict[str, str] = {"codec": "text", "dictionary_id": "integer"}
+    # When a row was last scraped, and a hash of its HISTORY_COLUMNS then.
+    TRACKING_COLUMNS: dict[str, str] = {"fingerprint": "blob", "checked_at": "real"}
+    # Fields recorded in house_history, one row each time any of them changes.
+    HISTORY_COLUMNS = ("price", "listing_status")
+    SUMMARY_COLUMNS = (
+        "url",
+        "status",
+        "property_id",
+        "display_address",
+        "price",
+        "bedrooms",
+    )
+    EXPORT_COLUMNS = ("url", "status", *HOT_COLUMNS, "checked_at")
+    # Run one at a time: executescript would commit the migration transaction.
+    SCHEMA = (
+        """
+        create table if not exists house_images (
+            url text not null,
+            position integer not null,
+            image_url text not null,
+            primary key (url, position)
+        ) without rowid
+        """,
+        "drop index if exists houses_status",
+        """
+        create index if not exists houses_status_page
+            on houses (status, display_address, url)
+        """,
+        "create index if not exists houses_price on houses (price)",
+        "create index if not exists houses_checked on houses (checked_at)",
+        """
+        create table if not exists house_keys (
+            id integer primary key,
+            url text not null unique
+        )
+        """,
+        """
+        create virtual table if not exists house_search using fts5 (
+            url unindexed,
+            address,
+            summary,
+            key_features,
+            tokenize = 'porter unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        create virtual table if not exists house_locations using rtree (
+            id, min_lat, max_lat, min_lng, max_lng, +url
+        )
+        """,
+        """
+        create table if not exists house_history (
+            url text not null,
+            recorded_at real not null,
+            price integer,
+            listing_status text,
+            primary key (url, recorded_at)
+        ) without rowid
+        """,
+        """
+        create table if not exists payload_dictionaries (
+            id integer primary key,
+            codec text not null,
+            data blob not null
+        )
+        """,
+    )
+    # Rows read per batch by the migrations that rewrite every row.
+    MIGRATION_BATCH = 1_000
+
+    def __init__(
+        self,
+        db_path,
+        *,
+        wal: bool = False,
+        synchronous: str | None = None,
+        cache_size: int | None = None,
+        compression: str | None = None,
+        check_same_thread: bool = False,
+        migrate: bool = True,
+    ) -> None:
+        """Open `db_path`, bringing its schema up to date unless `migrate=False`.
+
+        Stores opened with `migrate=False` must call `migrate` before use.
+        """
+        # Batch writes run in worker threads so the TUI keeps drawing. sqlite3
+        # serializes access to the connection, and `_lock` keeps one thread's
+        # transaction from interleaving with another's.
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self._pending_changes: list[PropertyChange] = []
+        self._data_version: int | None = None
+        self.changes = ChangeFeed()
+        self.compression = compression
+        self._codecs: dict[tuple[str, int | None], PayloadCodec] = {}
+        if wal:
+            self.conn.execute("pragma journal_mode = wal")
+        if synchronous is not None:
+            if synchronous.upper() not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+                raise ValueError(f"Invalid synchronous setting: {synchronous}")
+            self.conn.execute(f"pragma synchronous = {synchronous}")
+        if cache_size is not None:
+            self.conn.execute(f"pragma cache_size = {int(cache_size)}")
+        self._dictionary_id: int | None = None
+        if compression is not None:
+            get_codec(compression)
+        if migrate:
+            self.migrate()
+        self.poll_external_changes()
+
+    def get_property_constructor(self) -> type[RightMoveProperty]:
+        return self._constructor
 
     def supports_url(self, url: str) -> bool:
-        return check_url_host_in(url, self._valid_hosts)
+        return check_url_host_in(url, self.valid_hosts)
 
-    def _get_page_model(self, content: str) -> str:
-        pattern = r"window\.PAGE_MODEL\s*=\s*(\{(?:[^{}]|(?1))*\})"
-        match_ = regex.search(pattern, content, regex.DOTALL)
-        if not match_:
-            raise ValueError("Couldn't locate page model.")
-        return match_.group(1).strip()
+    def migrations(self) -> list[Migration]:
+        # Append a migration for every schema change. Steps a database has
+        # already been through never run again.
+        return [
+            Migration(
+                1, "Move a legacy property_number table aside", self._set_aside_legacy
+            ),
+            Migration(2, "Create url-keyed tables and indexes", self._create_schema),
+            Migration(
+                3, "Backfill hot columns, images and search indexes", self._backfill
+            ),
+            Migration(4, "Import legacy property_number rows", self._import_legacy),
+        ]
 
-    def parse(self, content: str) -> RightMoveProperty:
-        script = self._get_page_model(content)
-        property_data = orjson.loads(script)
-        return RightMoveProperty(property_data)
+    @property
+    def schema_version(self) -> int:
+        return schema_version(self.conn)
 
+    def migrate(
+        self,
+        *,
+        checkpoint: int | None = None,
+        progress: MigrationProgress | None = None,
+    ) -> list[Migration]:
+        """Apply pending migrations; see `utils.migrations.migrate`.
 
-class RightMoveStore:
-    _constructor: type[RightMoveProperty] = RightMoveProperty
-    valid_hosts: set[str] = {"rightmove.co.uk", "www.rightmove.co.uk"}
+        Without a `checkpoint` an interrupted migration leaves the database
+        untouched. With one, it resumes from the last commit.
+        """
+        applied = migrate_schema(
+            self.conn, self.migrations(), checkpoint=checkpoint, progress=progress
+        )
+        if self.compression is not None:
+            row = self.conn.execute(
+                "select max(id) from payload_dictionaries where codec = ?",
+                (self.compression,),
+            ).fetchone()
+            self._dictionary_id = row[0]
+        return applied
 
-    def __init__(self, db_path) -> None:
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+    def _table_columns(self, table: str) -> set[str]:
+        return {row["name"] for row in self.conn.execute(f"pragma table_info({table})")}
+
+    def _set_aside_legacy(self, _: str | None) -> None:
+        columns = self._table_columns("houses")
+        if "property_number" in columns and "url" not in columns:
+            self.conn.execute("alter table houses rename to legacy_houses")
+
+    def _create_schema(self, _: str | None) -> None:
         self.conn.execute(
             """
             create table if not exists houses (
@@ -115,71 +413,633 @@ class RightMoveStore:
             )
             """
         )
+        # Databases made before migrations existed may lack later columns.
+        existing = self._table_columns("houses")
+        added = self.HOT_COLUMNS | self.PAYLOAD_COLUMNS | self.TRACKING_COLUMNS
+        for column, type_ in added.items():
+            if column not in existing:
+                self.conn.execute(f"alter table houses add column {column} {type_}")
+        for statement in self.SCHEMA:
+            self.conn.execute(statement)
 
-    def get_property_constructor(self) -> type[RightMoveProperty]:
-        return self._constructor
+    def _backfill(self, after: str | None) -> Iterator[tuple[str, int]]:
+        """Recompute everything derived from the payloads, a batch at a time.
 
-    def supports_url(self, url: str) -> bool:
-        return check_url_host_in(url, self.valid_hosts)
+        Rows keep their payload encoding, status and checked_at. A row without
+        a fingerprint gets its first history entry.
+        """
+        assignments = ", ".join(f"{column} = ?" for column in self.HOT_COLUMNS)
+        last_url = after or ""
+        while True:
+            rows = self.conn.execute(
+                "select url, data, codec, dictionary_id, fingerprint, checked_at "
+                "from houses where url > ? order by url limit ?",
+                (last_url, self.MIGRATION_BATCH),
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                url = row["url"]
+                data = json.loads(
+                    self._decode(row["data"], row["codec"], row["dictionary_id"])
+                )
+                *values, image_urls = summarise_page_model(data)
+                hot = dict(zip(self.HOT_COLUMNS, values))
+                history = tuple(hot[column] for column in self.HISTORY_COLUMNS)
+                fingerprint = self._fingerprint(history)
+                self.conn.execute(
+                    f"update houses set {assignments}, fingerprint = ? where url = ?",
+                    (*values, fingerprint, url),
+                )
+                self._index(url, search_text(data), hot["latitude"], hot["longitude"])
+                if row["fingerprint"] != fingerprint:
+                    recorded_at = row["checked_at"] or time.time()
+                    self._record_history(url, recorded_at, history)
+                self._replace_images(url, image_urls)
+            last_url = rows[-1]["url"]
+            yield last_url, len(rows)
+
+    def _import_legacy(self, after: str | None) -> Iterator[tuple[str, int]]:
+        """Copy rows out of the table `_set_aside_legacy` renamed, then drop it.
+
+        Imported rows have no checked_at, so they are the first to be refreshed.
+        """
+        if not self._table_columns("legacy_houses"):
+            return
+        last_rowid = int(after or 0)
+        while True:
+            rows = self.conn.execute(
+                "select rowid, property_number, status, data from legacy_houses "
+                "where rowid > ? order by rowid limit ?",
+                (last_rowid, self.MIGRATION_BATCH),
+            ).fetchall()
+            if not rows:
+                break
+            for rowid, property_number, status, data in rows:
+                if isinstance(data, str):
+                    data = data.encode()
+                try:
+                    house = self._constructor.from_json(data, status)
+                except json.JSONDecodeError as error:
+                    raise ValueError(
+                        f"Could not read legacy property {property_number}"
+                    ) from error
+                url = RightMove.get_property_url(property_number)
+                self._write(url, house, status, None)
+            # Nothing can be listening yet, and a big import would otherwise
+            # hold a change for every row until the final commit.
+            self._pending_changes.clear()
+            last_rowid = rows[-1]["rowid"]
+            yield str(last_rowid), len(rows)
+        self.conn.execute("drop table legacy_houses")
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes into one commit. Nested blocks join the outer one.
+
+        Other threads wait to start a transaction until this one has committed.
+        """
+        with self._lock:
+            self._transaction_depth += 1
+            try:
+                yield
+            except BaseException:
+                self._transaction_depth -= 1
+                if not self._transaction_depth:
+                    self.conn.rollback()
+                    self._pending_changes.clear()
+                raise
+            self._transaction_depth -= 1
+            self._commit()
+
+    def _commit(self) -> None:
+        if self._transaction_depth:
+            return
+        with metrics.time("store.commit"):
+            self.conn.commit()
+        changes, self._pending_changes = self._pending_changes, []
+        for change in changes:
+            self.changes.publish(change)
+
+    def _old_status(self, url: str) -> tuple[bool, str | None]:
+        row = self.conn.execute(
+            "select status from houses where url = ?", (url,)
+        ).fetchone()
+        return (False, None) if row is None else (True, row[0])
+
+    def subscribe(self, listener: ChangeListener) -> Callable[[], None]:
+        return self.changes.subscribe(listener)
+
+    def poll_external_changes(self) -> bool:
+        """Return True if another connection has committed since the last poll."""
+        version = self.conn.execute("pragma data_version").fetchone()[0]
+        changed = self._data_version is not None and version != self._data_version
+        self._data_version = version
+        return changed
 
     def set(self, url: str, property: Property, status: str | None = None) -> str:
-        self.conn.execute(
-            "insert or replace into houses (url, status, data) values (?, ?, ?)",
-            (url, status, json.dumps(property.data)),
+        with self.transaction():
+            self._write(url, property, status, time.time())
+        return url
+
+    def set_many(
+        self, properties: Iterable[tuple[str, Property]], status: str | None = None
+    ) -> list[str]:
+        checked_at = time.time()
+        with self.transaction():
+            return [
+                self._write(url, property, status, checked_at)
+                for url, property in properties
+            ]
+
+    def refresh(self, url: str, property: Property) -> bool:
+        """Replace a stored listing's scraped data, keeping its current status.
+
+        Returns False without writing if the listing is no longer stored, so a
+        slow re-scrape can't undo a move or a delete made while it ran.
+        """
+        return bool(self.refresh_many([(url, property)]))
+
+    def refresh_many(self, properties: Iterable[tuple[str, Property]]) -> list[str]:
+        """`refresh` in one transaction, returning the urls that were written."""
+        checked_at = time.time()
+        with self.transaction():
+            written = [
+                self._write(url, property, None, checked_at, keep_status=True)
+                for url, property in properties
+            ]
+        return [url for url in written if url is not None]
+
+    def _write(
+        self,
+        url: str,
+        property: Property,
+        status: str | None,
+        checked_at: float | None,
+        *,
+        keep_status: bool = False,
+    ) -> str | None:
+        house = property
+        if not isinstance(house, RightMoveProperty):
+            house = self._constructor(property.data, status)
+        previous = self.conn.execute(
+            "select status, fingerprint from houses where url = ?", (url,)
+        ).fetchone()
+        existed = previous is not None
+        old_status = previous["status"] if existed else None
+        if keep_status:
+            if not existed:
+                return None
+            status = old_status
+        history = tuple(getattr(house, column) for column in self.HISTORY_COLUMNS)
+        fingerprint = self._fingerprint(history)
+        values = (
+            *self._encode(house.raw),
+            fingerprint,
+            checked_at,
+            *(getattr(house, column) for column in self.HOT_COLUMNS),
+        )
+        columns = ("data", "codec", "dictionary_id", "fingerprint", "checked_at")
+        columns += tuple(self.HOT_COLUMNS)
+        if keep_status:
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            self.conn.execute(
+                f"update houses set {assignments} where url = ?", (*values, url)
+            )
+        else:
+            self.conn.execute(
+                f"insert or replace into houses (url, status, {', '.join(columns)}) "
+                f"values (?, ?, {', '.join('?' * len(columns))})",
+                (url, status, *values),
+            )
+        self._index(url, house.search_text, house.latitude, house.longitude)
+        if not existed or previous["fingerprint"] != fingerprint:
+            recorded_at = time.time() if checked_at is None else checked_at
+            self._record_history(url, recorded_at, history)
+        self._replace_images(url, house.image_urls)
+        if not existed:
+            kind = ChangeKind.INSERTED
+        elif old_status != status:
+            kind = ChangeKind.STATUS_CHANGED
+        else:
+            kind = ChangeKind.UPDATED
+        summary = {"url": url, "status": status}
+        summary |= {
+            column: getattr(house, column) for column in self.SUMMARY_COLUMNS[2:]
+        }
+        self._pending_changes.append(
+            PropertyChange(kind, url, status, old_status, summary)
         )
-        self.conn.commit()
         return url
 
+    @staticmethod
+    def _fingerprint(history: tuple) -> bytes:
+        return hashlib.blake2b(json.dumps(history), digest_size=16).digest()
+
+    def _record_history(self, url: str, recorded_at: float, history: tuple) -> None:
+        self.conn.execute(
+            "insert or replace into house_history "
+            f"(url, recorded_at, {', '.join(self.HISTORY_COLUMNS)}) "
+            f"values (?, ?, {', '.join('?' * len(history))})",
+            (url, recorded_at, *history),
+        )
+
+    def _replace_images(self, url: str, image_urls: Iterable[str]) -> None:
+        self.conn.execute("delete from house_images where url = ?", (url,))
+        self.conn.executemany(
+            "insert into house_images (url, position, image_url) values (?, ?, ?)",
+            ((url, i, image_url) for i, image_url in enumerate(image_urls)),
+        )
+
+    def _index(
+        self,
+        url: str,
+        text: tuple[str, str, str],
+        latitude: float | None,
+        longitude: float | None,
+    ) -> None:
+        key = self._search_key(url)
+        indexed = self.conn.execute(
+            "select address, summary, key_features from house_search where rowid = ?",
+            (key,),
+        ).fetchone()
+        # Deleting from FTS5 re-tokenizes the old row, so unchanged text (the
+        # common case on a re-scrape) is left alone.
+        if indexed is None or tuple(indexed) != text:
+            if indexed is not None:
+                self.conn.execute("delete from house_search where rowid = ?", (key,))
+            self.conn.execute(
+                "insert into house_search (rowid, url, address, summary, key_features) "
+                "values (?, ?, ?, ?, ?)",
+                (key, url, *text),
+            )
+        if latitude is None or longitude is None:
+            self.conn.execute("delete from house_locations where id = ?", (key,))
+        else:
+            self.conn.execute(
+                "insert or replace into house_locations values (?, ?, ?, ?, ?, ?)",
+                (key, latitude, latitude, longitude, longitude, url),
+            )
+
+    def _search_key(self, url: str) -> int:
+        # FTS5 flushes its pending terms whenever rowids arrive out of order,
+        # so new rows get increasing integer keys rather than url hashes.
+        row = self.conn.execute(
+            "select id from house_keys where url = ?", (url,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        cursor = self.conn.execute("insert into house_keys (url) values (?)", (url,))
+        return cursor.lastrowid
+
+    def _unindex(self, url: str) -> None:
+        row = self.conn.execute(
+            "delete from house_keys where url = ? returning id", (url,)
+        ).fetchone()
+        if row is not None:
+            self.conn.execute("delete from house_search where rowid = ?", row)
+            self.conn.execute("delete from house_locations where id = ?", row)
+
+    def reindex_search(self) -> int:
+        """Rebuild the full-text and location indexes from the stored payloads."""
+        count = 0
+        with self.transaction():
+            self.conn.execute("delete from house_search")
+            self.conn.execute("delete from house_locations")
+            self.conn.execute("delete from house_keys")
+            rows = self.conn.execute(
+                "select url, data, codec, dictionary_id from houses"
+            )
+            for url, *payload in rows:
+                data = json.loads(self._decode(*payload))
+                latitude, longitude = summarise_page_model(data)[4:6]
+                self._index(url, search_text(data), latitude, longitude)
+                count += 1
+        return count
+
+    def _get_codec(self, name: str, dictionary_id: int | None) -> PayloadCodec:
+        key = (name, dictionary_id)
+        if key not in self._codecs:
+            dictionary = None
+            if dictionary_id is not None:
+                row = self.conn.execute(
+                    "select data from payload_dictionaries where id = ?",
+                    (dictionary_id,),
+                ).fetchone()
+                dictionary = row[0]
+            self._codecs[key] = get_codec(name, dictionary)
+        return self._codecs[key]
+
+    def _encode(self, payload: bytes) -> tuple[bytes, str | None, int | None]:
+        if self.compression is None:
+            return payload, None, None
+        codec = self._get_codec(self.compression, self._dictionary_id)
+        return codec.compress(payload), self.compression, self._dictionary_id
+
+    def _decode(
+        self, payload: bytes | str, codec: str | None, dictionary_id: int | None
+    ) -> bytes:
+        if isinstance(payload, str):
+            return payload.encode()
+        if codec is not None:
+            return self._get_codec(codec, dictionary_id).decompress(payload)
+        return payload
+
+    def train_dictionary(self, n_samples: int = 200, size: int = 64 * 1024) -> int:
+        """Train a shared dictionary from stored rows and use it for new writes."""
+        if self.compression is None:
+            raise ValueError("Store was opened without compression")
+        rows = self.conn.execute(
+            "select data, codec, dictionary_id from houses order by random() limit ?",
+            (n_samples,),
+        ).fetchall()
+        samples = [self._decode(*row) for row in rows]
+        dictionary = train_dictionary(self.compression, samples, size)
+        cursor = self.conn.execute(
+            "insert into payload_dictionaries (codec, data) values (?, ?)",
+            (self.compression, dictionary),
+        )
+        self._commit()
+        self._dictionary_id = cursor.lastrowid
+        return self._dictionary_id
+
+    def recompress(self, batch_size: int = 500) -> int:
+        """Re-encode every row not already stored in the current format."""
+        count, last_url = 0, ""
+        while True:
+            rows = self.conn.execute(
+                """
+                select url, data, codec, dictionary_id from houses
+                where url > ? and (codec is not ? or dictionary_id is not ?)
+                order by url limit ?
+                """,
+                (last_url, self.compression, self._dictionary_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return count
+            with self.transaction():
+                for url, *payload in rows:
+                    self.conn.execute(
+                        "update houses set data = ?, codec = ?, dictionary_id = ? "
+                        "where url = ?",
+                        (*self._encode(self._decode(*payload)), url),
+                    )
+            count += len(rows)
+            last_url = rows[-1]["url"]
+
     def get(self, url: str) -> RightMoveProperty | None:
+        columns = ", ".join(self.HOT_COLUMNS)
         cursor = self.conn.execute(
-            "select data, status from houses where url = ?", (url,)
+            f"select data, codec, dictionary_id, status, {columns} "
+            "from houses where url = ?",
+            (url,),
         )
         row = cursor.fetchone()
         if not row:
             return None
-        data, status = row[0]
+        payload = (row["data"], row["codec"], row["dictionary_id"])
         constructor = self.get_property_constructor()
-        return constructor(data, status)
+        return constructor.from_summary(
+            row, lambda: self._decode(*payload), row["status"]
+        )
+
+    def iter_properties(
+        self, status: str | None = None, batch_size: int = 500
+    ) -> Iterator[RightMoveProperty]:
+        """Yield compact properties without reading their JSON payloads.
+
+        Rows are paged by url, and each payload is loaded from the database
+        only if its `data` is accessed.
+        """
+        columns = ", ".join(self.HOT_COLUMNS)
+        where = "url > ?" if status is None else "url > ? and status = ?"
+        constructor = self.get_property_constructor()
+        last_url = ""
+        while True:
+            params = (last_url,) if status is None else (last_url, status)
+            rows = self.conn.execute(
+                f"select url, status, {columns} from houses where {where} "
+                "order by url limit ?",
+                (*params, batch_size),
+            ).fetchall()
+            for row in rows:
+                loader = partial(self._load_payload, row["url"])
+                yield constructor.from_summary(row, loader, row["status"])
+            if len(rows) < batch_size:
+                return
+            last_url = rows[-1]["url"]
+
+    def _load_payload(self, url: str) -> bytes:
+        row = self.conn.execute(
+            "select data, codec, dictionary_id from houses where url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            raise LookupError(f"No stored property for url: {url}")
+        return self._decode(*row)
 
     def delete(self, url: str) -> str:
-        query = "delete from houses where url = ?"
-        self.conn.execute(query, url)
-        self.conn.commit()
+        with self.transaction():
+            existed, old_status = self._old_status(url)
+            self.conn.execute("delete from house_images where url = ?", (url,))
+            self.conn.execute("delete from house_history where url = ?", (url,))
+            self._unindex(url)
+            self.conn.execute("delete from houses where url = ?", (url,))
+            if existed:
+                self._pending_changes.append(
+                    PropertyChange(ChangeKind.DELETED, url, None, old_status)
+                )
         return url
 
     def update(self, url: str, *, status: str) -> str:
-        raise NotImplementedError()
-
-    # def update_status(self, property_number, status):
-    #     query = "update houses set status = ? where property_number = ?"
-    #     self.conn.execute(query, (status, property_number))
-    #     self.conn.commit()
-
-    # def get_main_table_data(self, status: str):
-    #     query = HouseQuery().atomic_query(
-    #         [
-    #             ("property_number", "property_number"),
-    #             ("propertyData.address.displayAddress", "description"),
-    #         ],
-    #         status=status,
-    #     )
-    #     cursor = self.conn.execute(query)
-    #     return cursor.fetchall()
-    #
-    # def get_image_urls(self, property_number: str) -> list[str]:
-    #     query = HouseQuery().array_query(
-    #         "propertyData.images", [(".url", "url")], property_number=property_number
-    #     )
-    #     cursor = self.conn.execute(query)
-    #     data = cursor.fetchall()
+        with self.transaction():
+            summary = self.get_summary(url)
+            if summary is None:
+                return url
+            self.conn.execute(
+                "update houses set status = ? where url = ?", (status, url)
+            )
+            old_status = summary["status"]
+            summary["status"] = status
+            self._pending_changes.append(
+                PropertyChange(
+                    ChangeKind.STATUS_CHANGED, url, status, old_status, summary
+                )
+            )
+        return url
+
+    def get_summary(self, url: str) -> dict | None:
+        columns = ", ".join(self.SUMMARY_COLUMNS)
+        row = self.conn.execute(
+            f"select {columns} from houses where url = ?", (url,)
+        ).fetchone()
+        return None if row is None else dict(row)
+
+    def list_by_status(
+        self,
+        status: str,
+        after: tuple[str, str] | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """List summaries ordered by `(display_address, url)`.
+
+        `after` is the key of the last row already seen, so each page is a seek
+        on the status index rather than an offset scan.
+        """
+        query = f"""
+            select {", ".join(self.SUMMARY_COLUMNS)}
+            from houses where status = ?
+        """
+        params: list = [status]
+        if after is not None:
+            query += " and (display_address, url) > (?, ?)"
+            params.extend(after)
+        query += " order by display_address, url"
+        if limit is not None:
+            query += " limit ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def get_image_urls(self, url: str) -> list[str]:
+        cursor = self.conn.execute(
+            "select image_url from house_images where url = ? order by position",
+            (url,),
+        )
+        return [row[0] for row in cursor]
+
+    def search(
+        self,
+        text: str | None = None,
+        *,
+        bounds: tuple[float, float, float, float] | None = None,
+        status: str | None = None,
+        limit: int | None = 100,
+    ) -> list[dict]:
+        """Find summaries by free text and/or a (south, west, north, east) box.
+
+        Text matches each word as a prefix of the address, summary or key
+        features and is ranked by relevance; box-only searches are ordered by
+        address.
+        """
+        # The indexes drive the query: cross joins stop SQLite from starting at
+        # houses and probing the R*Tree by its unindexed url column.
+        tables: list[str] = []
+        where: list[str] = []
+        params: list = []
+        order = "h.display_address, h.url"
+        match = fts_query(text or "")
+        if match:
+            tables.append("house_search s")
+            where.append("house_search match ?")
+            params.append(match)
+            order = "s.rank"
+        if bounds is not None:
+            join = " on l.id = s.rowid" if match else ""
+            tables.append(f"house_locations l{join}")
+            where.append(
+                "l.min_lat >= ? and l.max_lat <= ? and l.min_lng >= ? and l.max_lng <= ?"
+            )
+            south, west, north, east = bounds
+            params.extend((south, north, west, east))
+        if tables:
+            tables.append(f"houses h on h.url = {tables[0][-1]}.url")
+        else:
+            tables.append("houses h")
+        columns = ", ".join(f"h.{column}" for column in self.SUMMARY_COLUMNS)
+        query = f"select {columns} from {' cross join '.join(tables)}"
+        if status is not None:
+            where.append("h.status = ?")
+            params.append(status)
+        if where:
+            query += " where " + " and ".join(where)
+        query += f" order by {order}"
+        if limit is not None:
+            query += " limit ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def list_stale(self, before: float, limit: int | None = None) -> list[dict]:
+        """List summaries last checked before `before`, never-checked rows first."""
+        query = f"""
+            select {", ".join(self.SUMMARY_COLUMNS)}, checked_at from houses
+            where checked_at is null or checked_at < ?
+            order by checked_at
+        """
+        params: list = [before]
+        if limit is not None:
+            query += " limit ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def mark_checked(
+        self, urls: Iterable[str], checked_at: float | None = None
+    ) -> None:
+        """Push rows to the back of the refresh queue without rewriting them."""
+        checked_at = time.time() if checked_at is None else checked_at
+        with self.transaction():
+            self.conn.executemany(
+                "update houses set checked_at = ? where url = ?",
+                ((checked_at, url) for url in urls),
+            )
+
+    def get_history(self, url: str) -> list[dict]:
+        cursor = self.conn.execute(
+            f"select recorded_at, {', '.join(self.HISTORY_COLUMNS)} "
+            "from house_history where url = ? order by recorded_at",
+            (url,),
+        )
+        return [dict(row) for row in cursor]
+
+    def iter_rows(
+        self,
+        status: str | None = None,
+        *,
+        with_data: bool = False,
+        batch_size: int = 500,
+    ) -> Iterator[dict]:
+        """Yield export rows ordered by url, reading `batch_size` at a time.
+
+        With `with_data`, each row also has the decoded PAGE_MODEL JSON bytes.
+        """
+        columns = ", ".join(self.EXPORT_COLUMNS)
+        if with_data:
+            columns += ", data, codec, dictionary_id"
+        where = "url > ?" if status is None else "url > ? and status = ?"
+        last_url = ""
+        while True:
+            params = (last_url,) if status is None else (last_url, status)
+            rows = self.conn.execute(
+                f"select {columns} from houses where {where} order by url limit ?",
+                (*params, batch_size),
+            ).fetchall()
+            for row in rows:
+                item = {column: row[column] for column in self.EXPORT_COLUMNS}
+                if with_data:
+                    item["data"] = self._decode(
+                        row["data"], row["codec"], row["dictionary_id"]
+                    )
+                yield item
+            if len(rows) < batch_size:
+                return
+            last_url = rows[-1]["url"]
+
+
+def components(db_path: str) -> SiteComponents:
+    """Entry point target for registering Rightmove as a `houses.sites` plugin."""
+    from .rightmove_fetcher import RightMoveFetcher
+
+    store = RightMoveStore(db_path, wal=True, synchronous="NORMAL")
+    return RightMove(), RightMoveFetcher(), RightMoveParser(), store
 
 
 async def main():
+    from .rightmove_fetcher import RightMoveFetcher
+
     property_number = "163179074"
     site = RightMove()
     url = site.get_property_url(property_number)
     fetcher = RightMoveFetcher()
     content = await fetcher.fetch_async(url)
+    await fetcher.aclose()
     parser = RightMoveParser()
     return parser.parse(content)
 
@@ -0,0 +1,201 @@
+"""Rightmove's HTTP fetcher, kept apart so the store and parser don't load httpx."""
+
+import asyncio
+from concurrent.futures import Future
+from functools import partial
+
+import httpx
+
+from .fetch_policy import FetchPolicy
+from .http_cache import ResponseCache
+from .metrics import metrics
+from .page_model import ModelStream
+from .rightmove import check_url_host_in
+
+__all__ = ["RightMoveFetcher"]
+
+
+class RightMoveFetcher:
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
+        "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
+        "Accept-Encoding": "gzip, deflate",
+        "DNT": "1",
+        "Connection": "keep-alive",
+        "Upgrade-Insecure-Requests": "1",
+        "Sec-Fetch-Dest": "document",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-Site": "none",
+        "Cache-Control": "max-age=0",
+    }
+    LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    TIMEOUT = httpx.Timeout(30.0)
+    valid_hosts: set[str] = {"rightmove.co.uk", "www.rightmove.co.uk"}
+
+    def __init__(
+        self,
+        limits: httpx.Limits | None = None,
+        http2: bool = False,
+        timeout: httpx.Timeout | None = None,
+        cache: ResponseCache | None = None,
+        offline: bool = False,
+        stream_models: bool = False,
+        policy: FetchPolicy | None = None,
+    ) -> None:
+        self.limits = limits or self.LIMITS
+        self.http2 = http2
+        self.timeout = timeout or self.TIMEOUT
+        self.cache = cache
+        self.offline = offline
+        # Read pages only as far as the end of PAGE_MODEL. The remaining body is
+        # abandoned, which costs the keep-alive connection on HTTP/1.1. Partial
+        # bodies can't be cached, so this is ignored when a cache is set.
+        self.stream_models = stream_models
+        self.policy = policy if policy is not None else FetchPolicy()
+        self._client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(
+                headers=self.HEADERS,
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """The async client for the running event loop.
+
+        An AsyncClient's connections belong to the loop that opened them, so a
+        new pool is started if the fetcher is reused from another event loop,
+        and the old one is closed on its own loop. If that loop has already been
+        closed, as after `asyncio.run`, the old connections can't be shut down
+        cleanly: they are dropped and their sockets freed by garbage collection.
+        `HouseService` runs its blocking methods on one long-lived loop so this
+        only happens when callers mix loops themselves.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._release_async_client()
+            self._async_client = httpx.AsyncClient(
+                headers=self.HEADERS,
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    def supports_url(self, url: str) -> bool:
+        return check_url_host_in(url.lower(), self.valid_hosts)
+
+    def fetch(self, url: str) -> str | bytes:
+        if self.offline:
+            return self._read_cached(url)
+        if self.stream_models and self.cache is None:
+            return self.policy.run_sync(url, partial(self._stream_model, url))
+        return self.policy.run_sync(url, partial(self._fetch_page, url))
+
+    async def fetch_async(self, url: str) -> str | bytes:
+        if self.offline:
+            return self._read_cached(url)
+        if self.stream_models and self.cache is None:
+            return await self.policy.run(url, partial(self._stream_model_async, url))
+        return await self.policy.run(url, partial(self._fetch_page_async, url))
+
+    def _fetch_page(self, url: str) -> str:
+        response = self.client.get(url, headers=self._validators(url))
+        text = self._read_response(url, response)
+        if text is None:
+            text = self._read_response(url, self.client.get(url))
+        return text or ""
+
+    async def _fetch_page_async(self, url: str) -> str:
+        response = await self.async_client.get(url, headers=self._validators(url))
+        text = self._read_response(url, response)
+        if text is None:
+            text = self._read_response(url, await self.async_client.get(url))
+        return text or ""
+
+    def _stream_model(self, url: str) -> bytes:
+        stream = ModelStream()
+        with self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                if stream.feed(chunk):
+                    break
+        return stream.model
+
+    async def _stream_model_async(self, url: str) -> bytes:
+        stream = ModelStream()
+        async with self.async_client.stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                if stream.feed(chunk):
+                    break
+        return stream.model
+
+    def _validators(self, url: str) -> dict[str, str]:
+        return self.cache.request_headers(url) if self.cache is not None else {}
+
+    def _read_cached(self, url: str) -> str:
+        cached = self.cache.get(url) if self.cache is not None else None
+        if cached is None:
+            raise LookupError(f"No cached response for url: {url}")
+        return cached.body.decode(cached.encoding or "utf-8")
+
+    def _read_response(self, url: str, response: httpx.Response) -> str | None:
+        """Return the page text, or None if a 304 arrived for an evicted body."""
+        if response.status_code == httpx.codes.NOT_MODIFIED and self.cache is not None:
+            try:
+                text = self._read_cached(url)
+            except LookupError:
+                return None
+            metrics.count("http_cache.hit")
+            return text
+        response.raise_for_status()
+        if self.cache is not None:
+            metrics.count("http_cache.miss")
+            self.cache.put(url, response.content, response.headers, response.encoding)
+        return response.text
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def _release_async_client(self) -> Future | None:
+        """Forget the async client, scheduling its close on the loop it belongs to.
+
+        Returns the scheduled close, or None if there was no client or its loop
+        is closed and the client can only be dropped.
+        """
+        client, loop = self._async_client, self._async_loop
+        self._async_client = None
+        self._async_loop = None
+        if client is None or loop is None or loop.is_closed():
+            return None
+        return asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._async_loop is asyncio.get_running_loop():
+            client, self._async_client, self._async_loop = (
+                self._async_client,
+                None,
+                None,
+            )
+            await client.aclose()
+        else:
+            # Runs when that loop next runs, if it is idle rather than closed.
+            self._release_async_client()
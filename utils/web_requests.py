@@ -1,14 +1,11 @@
 import asyncio
-import re
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Sequence
 
 import httpx
-import orjson as json
-import regex
 import requests
-from bs4 import BeautifulSoup
 
-from utils import JSON_STORE, JSONStore
+from utils.fetch_policy import FetchPolicy
+from utils.page_model import load_models
 
 __all__ = ["get_property_models", "get_property_models_async"]
 
@@ -39,75 +36,40 @@ def get_property_response(property_number: str) -> requests.Response:
     return response
 
 
-def extract_model_script(response: requests.Response | httpx.Response) -> str:
-    soup = BeautifulSoup(response.text)
-    pattern = re.compile(r"window\.(\w+)\s*=\s*\{")
-    script = soup.find("script", string=pattern)
-    if not script:
-        return ""
-    return script.get_text(strip=True)
-
-
-def extract_models(script_text: str) -> dict[str, dict]:
-    models = {}
-    pattern = r"window\.(\w+)\s*=\s*(\{(?:[^{}]|(?2))*\})"
-    for match in regex.finditer(pattern, script_text, regex.DOTALL):
-        model_name = match.group(1)
-        js_content = match.group(2)
-        try:
-            models[model_name] = json.loads(js_content)
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse {model_name}: {e}")
-    return models
+def extract_models(content: str | bytes) -> dict[str, dict]:
+    return load_models(content)
 
 
 def get_property_models(property_number: str) -> dict[str, dict]:
     response = get_property_response(property_number)
-    script_text = extract_model_script(response)
-    return extract_models(script_text)
+    return extract_models(response.content)
 
 
 async def fetch_with_retry(
-    client: httpx.AsyncClient, url: str, max_concurrent: int = 5, retries: int = 2
+    client: httpx.AsyncClient, url: str, policy: FetchPolicy
 ) -> bytes:
-    semaphore = asyncio.Semaphore(max_concurrent)
-    async with semaphore:
-        for attempt in range(retries + 1):
-            try:
-                response = await client.get(
-                    url, headers=HEADERS, timeout=httpx.Timeout(30.0)
-                )
-                response.raise_for_status()
-
-                return response.content
-
-            except (httpx.RequestError, httpx.HTTPStatusError):
-                if attempt < retries:
-                    # Exponential backoff for retries
-                    wait_time = (2**attempt) * 0.5
-                    await asyncio.sleep(wait_time)
-                    continue
-        print(f"Failed to fetch {url} after {retries} retries")
-        return b""
+    async def get() -> bytes:
+        response = await client.get(url, headers=HEADERS, timeout=httpx.Timeout(30.0))
+        response.raise_for_status()
+        return response.content
+
+    return await policy.run(url, get)
 
 
 async def get_property_images_async(
-    property_number: str, max_concurrent: int = 5, retries: int = 2
+    urls: Sequence[str], max_concurrent: int = 5, retries: int = 2
 ) -> AsyncGenerator[bytes, None]:
-    urls = JSONStore(JSON_STORE).get_image_urls(property_number)
-
     # Use client with connection limits
     limits = httpx.Limits(max_keepalive_connections=5, max_connections=10)
+    policy = FetchPolicy(max_per_host=max_concurrent, retries=retries)
     async with httpx.AsyncClient(limits=limits) as client:
-        tasks = [fetch_with_retry(client, url, max_concurrent, retries) for url in urls]
+        tasks = [fetch_with_retry(client, url, policy) for url in urls]
         header_image = tasks[0]
         content = await header_image
         yield content
 
         for task in asyncio.as_completed(tasks[1:]):
-            content = await task
-            if content:
-                yield content
+            yield await task
 
 
 async def get_property_response_async(property_number: str) -> httpx.Response:
@@ -118,5 +80,4 @@ async def get_property_response_async(property_number: str) -> httpx.Response:
 
 async def get_property_models_async(property_number: str) -> dict[str, dict]:
     response = await get_property_response_async(property_number)
-    script_text = extract_model_script(response)
-    return extract_models(script_text)
+    return extract_models(response.content)
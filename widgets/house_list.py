@@ -1,12 +1,25 @@
+from collections.abc import Callable
+
 from textual.app import ComposeResult
 from textual.containers import Container, Horizontal
+from textual.coordinate import Coordinate
 from textual.events import Focus
 from textual.message import Message
-from textual.reactive import reactive
+from textual.reactive import reactive, var
 from textual.screen import ModalScreen
-from textual.widgets import Button, DataTable, Footer, Input, Label, Select
+from textual.widgets import (
+    Button,
+    DataTable,
+    Footer,
+    Input,
+    Label,
+    ProgressBar,
+    Select,
+)
 
 from protocols import PropertyService
+from utils.changes import ChangeKind, PropertyChange
+from utils.metrics import metrics
 
 __all__ = ["HouseList", "IDS"]
 
@@ -82,16 +95,41 @@ class MoveScreen(ModalScreen[str]):
 
 class HouseList(DataTable):
     BINDINGS = [("m", "move_house", "Move"), ("a", "add_house", "Add House")]
+    PAGE_MARGIN = 20
+    SEARCH_LIMIT = 500
     data: reactive[list[dict]] = reactive([])
-    property_number: reactive[str] = reactive("")
+    property_url: reactive[str] = reactive("")
+    # The search shown in place of the list, set by `show_results`.
+    filter_text: var[str] = var("")
+    _page_key: tuple[str, str] | None = None
+    _exhausted: bool = False
+    # The `(display_address, url)` of the last row, if rows are in store order.
+    _last_key: tuple[str, str] | None = None
+    _reorder_scheduled: bool = False
+    # Set once the app has opened its store, shortly after the first frame.
+    service: PropertyService | None = None
+    _unsubscribe: Callable[[], None] | None = None
 
     def on_mount(self) -> None:
         self.set_border_title_from_id()
-        self.service: PropertyService = self.app.service
         self.cursor_type = "row"
-        self.add_columns("ID", "Description")
+        self.add_column("ID", key="id")
+        self.add_column("Description", key="description")
+        self.watch(self.app, "service", self.connect_service)
+
+    def connect_service(self, service: PropertyService | None) -> None:
+        if service is None or self.service is not None:
+            return
+        self.service = service
+        self._unsubscribe = service.subscribe(
+            lambda change: self.post_message(self.PropertyChanged(change))
+        )
         self.load_data()
 
+    def on_unmount(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+
     def set_border_title_from_id(self) -> None:
         id = self.id or ""
         parts = id.split("-")
@@ -105,36 +143,165 @@ class HouseList(DataTable):
             to_save, site_name, ids = houses
             if not to_save:
                 return
-            property_id = ids[0]
-            self.service.add_property(site_name, property_id, TO_REVIEW)
-            self.load_data()
+            self.run_worker(
+                self.import_houses(site_name, ids), group="import", exit_on_error=False
+            )
 
         self.app.push_screen(AddHouseScreen(), process_houses)
 
+    async def import_houses(self, site_name: str, ids: list[str]) -> None:
+        progress = self.screen.query_one("#import-progress", ProgressBar)
+        progress.update(total=len(dict.fromkeys(ids)), progress=0)
+        progress.display = True
+        failed: list[str] = []
+
+        def advance(property_id: str, result: object) -> None:
+            progress.advance(1)
+            if isinstance(result, Exception):
+                failed.append(property_id)
+
+        try:
+            await self.service.add_properties_async(
+                site_name, ids, TO_REVIEW, progress=advance
+            )
+        finally:
+            progress.display = False
+        if failed:
+            self.notify(f"Could not import: {', '.join(failed)}", severity="error")
+
     def action_move_house(self) -> None:
-        def move_house(to: str | None) -> None: ...
+        def move_house(to: str | None) -> None:
+            if to and self.property_url:
+                self.service.update_property(self.property_url, status=to)
 
         self.app.push_screen(MoveScreen(), move_house)
 
     def load_data(self) -> None:
         self.clear()
+        self.filter_text = ""
+        self._page_key = None
+        self._last_key = None
+        self._exhausted = False
+        self.load_more()
+
+    def show_results(self, text: str, rows: list[dict]) -> None:
+        """Replace the list with search results for `text`, in ranked order."""
+        self.clear()
+        self.filter_text = text
+        self._last_key = None
+        self._exhausted = True
+        for row in rows:
+            self.add_row(row["property_id"], row["display_address"], key=row["url"])
+
+    def load_more(self) -> None:
+        """Append the next visible screenful of rows, plus a margin."""
+        # Until then connect_service loads the first page when it arrives.
+        if self._exhausted or self.service is None:
+            return
+        with metrics.time("table.load"):
+            self._load_page()
+
+    def _load_page(self) -> None:
+        limit = max(self.size.height, 10) + self.PAGE_MARGIN
+        rows = self.service.list_properties(self.id or "", self._page_key, limit)
+        for row in rows:
+            self.add_row(row["property_id"], row["display_address"], key=row["url"])
+        if rows:
+            self._page_key = (rows[-1]["display_address"], rows[-1]["url"])
+            self._last_key = self._page_key
+        self._exhausted = len(rows) < limit
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        if new_value + self.size.height >= self.row_count - self.PAGE_MARGIN:
+            self.load_more()
+
+    class PropertyChanged(Message, bubble=False):
+        def __init__(self, change: PropertyChange) -> None:
+            super().__init__()
+            self.change = change
+
+    def on_house_list_property_changed(self, message: PropertyChanged) -> None:
+        with metrics.time("table.apply_change"):
+            self.apply_change(message.change)
+
+    def apply_change(self, change: PropertyChange) -> None:
+        """Add, update or remove the one row affected by a store change."""
+        listed = change.url in self.rows
+        belongs = change.kind != ChangeKind.DELETED and change.status == self.id
+        if listed and not belongs:
+            self.remove_row(change.url)
+        elif belongs and change.summary is not None:
+            summary = change.summary
+            if listed:
+                self.update_cell(change.url, "description", summary["display_address"])
+                return
+            key = (summary["display_address"], change.url)
+            # Rows past the loaded page arrive with the next page instead, and
+            # new rows aren't matched against an active filter.
+            if self.filter_text:
+                return
+            if self._exhausted or (self._page_key and key <= self._page_key):
+                self.add_row(
+                    summary["property_id"], summary["display_address"], key=change.url
+                )
+                if self._last_key is None or key > self._last_key:
+                    self._last_key = key
+                elif not self._reorder_scheduled:
+                    # A burst of changes, such as an import, is re-ordered once
+                    # after the last of its messages has been handled.
+                    self._reorder_scheduled = True
+                    self.call_later(self.reorder_rows)
+
+    def reorder_rows(self) -> None:
+        """Put rows back in the store's `(display_address, url)` order."""
+        self._reorder_scheduled = False
+        if self.filter_text:
+            return
+        rows = [(self.get_row(row_key), row_key.value) for row_key in self.rows]
+        rows.sort(key=lambda row: (row[0][1], row[1]))
+        highlighted = self.property_url
+        self.clear()
+        for cells, url in rows:
+            self.add_row(*cells, key=url)
+        if rows:
+            self._last_key = (rows[-1][0][1], rows[-1][1])
+        if highlighted in self.rows:
+            self.move_cursor(row=self.get_row_index(highlighted), scroll=False)
 
     class HouseSelectionChanged(Message):
-        def __init__(self, property_number: str) -> None:
+        def __init__(self, url: str) -> None:
             super().__init__()
-            self.property_number = property_number
+            self.url = url
 
     def notify_container(self) -> None:
-        if not self.has_focus_within:
+        if not self.has_focus_within or not self.property_url:
             return
         containers = self.screen.query("#detail-container")
         if not containers:
             return
         detail_container = containers.first()
-        detail_container.post_message(self.HouseSelectionChanged(self.property_number))
+        detail_container.post_message(self.HouseSelectionChanged(self.property_url))
+
+    def prefetch_neighbours(self, row: int) -> None:
+        # Apps given only a service up front have no image loader.
+        if self.app.images is None:
+            return
+        urls = []
+        for neighbour in (row - 1, row + 1):
+            if 0 <= neighbour < self.row_count:
+                cell_key = self.coordinate_to_cell_key(Coordinate(neighbour, 0))
+                urls.extend(self.service.get_image_urls(cell_key.row_key.value)[:1])
+        self.app.images.prefetch(urls)
+
+    def watch_property_url(self) -> None:
+        self.notify_container()
 
     def on_data_table_row_highlighted(self, message: DataTable.RowHighlighted) -> None:
-        self.property_number = message.row_key.value or ""
+        self.property_url = message.row_key.value or ""
+        self.prefetch_neighbours(message.cursor_row)
+        if message.cursor_row >= self.row_count - self.PAGE_MARGIN:
+            self.load_more()
 
     def on_focus(self, message: Focus) -> None:
         if message.from_app_focus: